@@ -4,15 +4,24 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from app.data_processor import DataProcessor
-from app.forecaster import Forecaster
+from app.forecaster import Forecaster, forecast_model_cache
 from app.load_balancer import LoadBalancer
 from app.utils import Visualizer
 from app.auto_scaler import AutoScaler
+from app.sweep import run_sweep
+from app.backtest import Backtester
+from app.api import api, MAX_CONTENT_LENGTH
 from app.notifications import send_notification  # Import the notification function
 from flask import Flask, jsonify, request
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import logging
 
+# Forecasting backends offered on the Settings page
+FORECAST_BACKENDS = {"Prophet": "prophet", "Fourier Ridge": "fourier_ridge", "Seasonal Naive": "seasonal_naive"}
+# Slider limits on the Forecasting page
+MAX_FORECAST_PERIODS = 168
+MAX_BACKTEST_CUTOFFS = 200
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
@@ -42,23 +51,9 @@ def logout():
     logout_user()
     return jsonify({"message": "Logged out"}), 200
 
-@app_flask.route('/api/forecast', methods=['POST'])
-def api_forecast():
-    data = request.json
-    # Forecasting logic...
-    response = {
-        "forecast": "example_forecast_data"
-    }
-    return jsonify(response)
-
-@app_flask.route('/api/load_balance', methods=['POST'])
-def api_load_balance():
-    data = request.json
-    # Load balancing logic...
-    response = {
-        "load_balance": "example_load_balance_data"
-    }
-    return jsonify(response)
+# Forecast and load balancing endpoints
+app_flask.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+app_flask.register_blueprint(api)
 
 # Streamlit app
 st.set_page_config(
@@ -71,7 +66,11 @@ st.set_page_config(
 if 'data_processor' not in st.session_state:
     st.session_state.data_processor = DataProcessor()
 if 'forecaster' not in st.session_state:
-    st.session_state.forecaster = Forecaster()
+    # Fitted models are cached in memory, and on disk when FORECAST_CACHE_DIR is set
+    st.session_state.forecaster = Forecaster(cache=forecast_model_cache(cache_dir=os.getenv('FORECAST_CACHE_DIR')))
+if 'backtest_cache' not in st.session_state:
+    # Backtest fits are kept apart from the forecast model, with room for every cutoff
+    st.session_state.backtest_cache = forecast_model_cache(maxsize=MAX_BACKTEST_CUTOFFS)
 if 'load_balancer' not in st.session_state:
     st.session_state.load_balancer = LoadBalancer()
 if 'visualizer' not in st.session_state:
@@ -112,9 +111,11 @@ if page == "Forecasting":
     # Forecasting parameters
     col1, col2 = st.columns(2)
     with col1:
-        forecast_periods = st.slider("Forecast Periods (hours)", 24, 168, 24)
+        forecast_periods = st.slider("Forecast Periods (hours)", 24, MAX_FORECAST_PERIODS, 24)
     with col2:
         target_col = st.selectbox("Target Variable", ["active_users", "server_load", "response_time"])
+    num_cutoffs = st.slider("Backtest Cutoffs", 1, MAX_BACKTEST_CUTOFFS, 5,
+                            help="Out-of-sample forecasts used to score the model, one fit per cutoff.")
 
     # Train and forecast
     if st.button("Generate Forecast"):
@@ -127,17 +128,25 @@ if page == "Forecasting":
             fig = st.session_state.visualizer.plot_forecast(forecast, prophet_data)
             st.plotly_chart(fig, use_container_width=True)
             
-            # Show metrics
-            metrics = st.session_state.forecaster.get_metrics(
-                prophet_data['y'][-forecast_periods:],
-                forecast['yhat'][-forecast_periods:]
-            )
+            # Score out-of-sample forecasts from rolling cutoffs placed for the longest horizon,
+            # so their cached fits are reused whichever horizon is chosen
+            backtester = Backtester(backend=st.session_state.forecaster.backend,
+                                    model_params=st.session_state.forecaster.model_params,
+                                    cache=st.session_state.backtest_cache, max_horizon=MAX_FORECAST_PERIODS)
+            backtest = backtester.run(prophet_data, horizon=forecast_periods, num_cutoffs=num_cutoffs).dropna(subset=['y'])
+            metrics = st.session_state.forecaster.get_metrics(backtest['y'], backtest['yhat'])
             st.subheader("Forecast Metrics")
+            st.caption(f"Backtested over {backtest['cutoff'].nunique()} cutoffs")
             col1, col2, col3 = st.columns(3)
             col1.metric("MAE", f"{metrics['MAE']:.2f}")
             col2.metric("MSE", f"{metrics['MSE']:.2f}")
             col3.metric("RMSE", f"{metrics['RMSE']:.2f}")
 
+            with st.expander("Error by Forecast Horizon"):
+                horizon_metrics = Backtester.horizon_metrics(backtest)
+                st.line_chart(horizon_metrics[['MAE', 'RMSE']])
+                st.dataframe(horizon_metrics)
+
             # Send notification
             recipient_email = st.session_state.recipient_email  # Get the recipient email from session state
             details = f"Forecast Periods: {forecast_periods}\nTarget Column: {target_col}\nMetrics:\nMAE: {metrics['MAE']:.2f}\nMSE: {metrics['MSE']:.2f}\nRMSE: {metrics['RMSE']:.2f}\nTime: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
@@ -161,18 +170,10 @@ elif page == "Load Balancing":
     if st.button("Simulate Load Balancing"):
         with st.spinner("Simulating load balancing..."):
             # Simulate requests
-            if algorithm == "Round Robin":
-                for _ in range(100):
-                    st.session_state.load_balancer.round_robin(request_load)
-            elif algorithm == "Least Connections":
-                for _ in range(100):
-                    st.session_state.load_balancer.least_connections(request_load)
-            elif algorithm == "IP Hash":
-                for _ in range(100):
-                    st.session_state.load_balancer.ip_hash(f"192.168.0.{_}", request_load)
-            elif algorithm == "Weighted Round Robin":
-                for _ in range(100):
-                    st.session_state.load_balancer.weighted_round_robin(request_load)
+            strategy = algorithm.lower().replace(" ", "_")
+            request_loads = np.full(100, request_load, dtype=float)
+            request_ips = [f"192.168.0.{i}" for i in range(100)] if strategy == "ip_hash" else None
+            st.session_state.load_balancer.dispatch_batch(strategy, request_loads, request_ips)
 
             # Get and display metrics
             server_metrics = st.session_state.load_balancer.get_server_metrics()
@@ -196,9 +197,24 @@ elif page == "Load Balancing":
             details = f"Algorithm: {algorithm}\nNumber of Servers: {num_servers}\nRequest Load: {request_load}\nTime: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
             send_notification(st.session_state.notification_method, "Load balancing simulation completed.", recipient_email, details)
 
+    # Compare every algorithm over several seeds in parallel
+    if st.button("Compare All Algorithms"):
+        with st.spinner("Running simulation sweep..."):
+            sweep = run_sweep(num_servers=[num_servers], request_loads=[request_load], seeds=range(5))
+            summary = sweep.groupby("strategy")[["avg_load", "max_load", "avg_response_time", "dist_load_imbalance"]].mean()
+            st.subheader("Algorithm Comparison")
+            st.dataframe(summary)
+
     # Auto-scaling check
     if st.button("Check Auto-scaling"):
-        st.session_state.auto_scaler.check_and_scale()
+        auto_scaler = st.session_state.auto_scaler
+        if auto_scaler.mode == 'predictive' and st.session_state.forecaster.forecast is None:
+            st.warning("Predictive scaling needs a forecast; generate one on the Forecasting page first.")
+        else:
+            auto_scaler.forecaster = st.session_state.forecaster
+            decision = auto_scaler.check_and_scale()
+            if decision:
+                st.write(f"Scaled {decision['from']} -> {decision['to']} servers: {decision['reason']}")
         st.write(f"Number of Servers: {st.session_state.load_balancer.num_servers}")
         # Send notification
         recipient_email = st.session_state.recipient_email  # Get the recipient email from session state
@@ -210,13 +226,31 @@ elif page == "Settings":
 
     # Customizable settings
     st.subheader("Forecasting Model Settings")
-    forecasting_model = st.selectbox("Select Forecasting Model", ["Prophet", "ARIMA", "XGBoost"])
+    backend_names = list(FORECAST_BACKENDS)
+    current_backend = list(FORECAST_BACKENDS.values()).index(st.session_state.forecaster.backend)
+    forecasting_model = st.selectbox("Select Forecasting Model", backend_names, index=current_backend)
+    if FORECAST_BACKENDS[forecasting_model] != st.session_state.forecaster.backend:
+        st.session_state.forecaster = Forecaster(cache=st.session_state.forecaster.cache,
+                                                 backend=FORECAST_BACKENDS[forecasting_model])
     st.write(f"Current model: {forecasting_model}")
 
     st.subheader("Load Balancing Algorithm Settings")
     load_balancing_algorithm = st.selectbox("Select Load Balancing Algorithm", ["Round Robin", "Least Connections", "IP Hash", "Weighted Round Robin"])
     st.write(f"Current algorithm: {load_balancing_algorithm}")
 
+    st.subheader("Auto-scaling Settings")
+    scaling_mode = st.selectbox("Scaling Mode", ["Reactive", "Predictive"],
+                                index=["reactive", "predictive"].index(st.session_state.auto_scaler.mode))
+    st.session_state.auto_scaler.mode = scaling_mode.lower()
+    if scaling_mode == "Predictive":
+        st.session_state.auto_scaler.capacity_per_server = st.number_input(
+            "Forecast load per server at 100% utilization", min_value=1.0,
+            value=float(st.session_state.auto_scaler.capacity_per_server))
+        st.session_state.auto_scaler.target_utilization = st.slider(
+            "Target Utilization", 0.3, 0.95, float(st.session_state.auto_scaler.target_utilization))
+        st.session_state.auto_scaler.horizon = st.slider(
+            "Look-ahead (forecast periods)", 1, 48, st.session_state.auto_scaler.horizon)
+
     st.subheader("Notification Preferences")
     notification_method = st.selectbox("Notification Method", ["Email"])
     st.session_state.notification_method = notification_method  # Save the selected notification method
@@ -0,0 +1,48 @@
+import numpy as np
+
+class AliasTable:
+    """Walker/Vose alias table for O(1) weighted random selection.
+
+    Building the table is O(n); every draw afterwards costs one uniform random
+    number, one lookup and one comparison, however many entries there are.
+    """
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=float)
+        if not len(weights) or np.any(weights < 0) or not np.isfinite(weights).all() or weights.sum() <= 0:
+            raise ValueError("Weights must be non-negative, finite and not all zero")
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        accept = np.ones(n)
+        alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1]
+        large = [i for i in range(n) if scaled[i] >= 1]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            accept[low] = scaled[low]
+            alias[low] = high
+            scaled[high] -= 1 - scaled[low]
+            (small if scaled[high] < 1 else large).append(high)
+        # Whatever is left over is 1 up to rounding error
+
+        self.weights = weights
+        self._accept = accept
+        self._alias = alias
+        self._accept_list = accept.tolist()
+        self._alias_list = alias.tolist()
+
+    def __len__(self):
+        return len(self._accept)
+
+    def draw(self, rng):
+        """Draw one index with probability proportional to its weight"""
+        position = rng.random() * len(self._accept_list)
+        index = int(position)
+        return index if position - index < self._accept_list[index] else self._alias_list[index]
+
+    def draw_many(self, rng, size):
+        """Draw `size` indexes at once; gives the same sequence as `size` calls to draw()"""
+        positions = rng.random(size) * len(self._accept)
+        indexes = positions.astype(np.int64)
+        return np.where(positions - indexes < self._accept[indexes], indexes, self._alias[indexes])
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+
+class StreamingAnomalyDetector:
+    """Online anomaly detector scoring one value at a time in O(1).
+
+    Each value is compared with an exponentially weighted mean and variance of the
+    values before it and flagged when its z-score exceeds `threshold`. When a
+    forecast band is given, values outside [lower, upper] are flagged as well.
+    Flagged values are clipped before they update the baseline, so a burst of
+    outliers does not immediately become the new normal.
+    """
+
+    def __init__(self, alpha=0.05, threshold=3.0, warmup=30):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        self.anomalies = 0
+
+    def score(self, value):
+        """z-score of value against the current baseline, without updating it"""
+        if self.count == 0:
+            return 0.0
+        std = math.sqrt(self.var)
+        if std == 0:
+            return 0.0 if value == self.mean else math.copysign(math.inf, value - self.mean)
+        return (value - self.mean) / std
+
+    def update(self, value, lower=None, upper=None):
+        """Score a new value, add it to the baseline and return True if it is anomalous"""
+        if math.isnan(value):
+            return False  # Missing values are neither scored nor learned from
+        z = self.score(value)
+        outside_band = (lower is not None and value < lower) or (upper is not None and value > upper)
+        outlier = self.count >= self.warmup and abs(z) > self.threshold
+        is_anomaly = outside_band or outlier
+
+        if outlier:
+            # Only let the outlier pull the baseline as far as the threshold
+            value = self.mean + math.copysign(self.threshold * math.sqrt(self.var), value - self.mean)
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+        self.anomalies += is_anomaly
+        return is_anomaly
+
+    def update_many(self, values, lower=None, upper=None):
+        """Score a micro-batch in order and return a boolean array of anomalies"""
+        values = np.asarray(values, dtype=float)
+        lower = np.broadcast_to(np.nan if lower is None else lower, values.shape)
+        upper = np.broadcast_to(np.nan if upper is None else upper, values.shape)
+        flags = np.zeros(len(values), dtype=bool)
+        for i, (value, low, high) in enumerate(zip(values.tolist(), lower.tolist(), upper.tolist())):
+            flags[i] = self.update(value,
+                                   None if math.isnan(low) else low,
+                                   None if math.isnan(high) else high)
+        return flags
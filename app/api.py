@@ -0,0 +1,309 @@
+import contextlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from flask import Blueprint, Flask, Response, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from .forecast_backends import BACKENDS, FORECAST_COLUMNS
+from .forecaster import Forecaster, forecast_model_cache
+from .load_balancer import LoadBalancer
+from .model_cache import ModelCache
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+try:
+    import fcntl
+except ImportError:  # No cross-process fit lock on Windows
+    fcntl = None
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Request limits, so one request cannot make a worker build arbitrarily large structures
+MAX_CONTENT_LENGTH = 64 * 2**20
+MAX_ROWS = 1_000_000
+MAX_PERIODS = 24 * 366
+MAX_SERVERS = 1000
+# Accepted ranges of numeric model parameters; other parameters must match the type of their default
+MODEL_PARAM_RANGES = {
+    'daily_order': (0, 20),
+    'weekly_order': (0, 20),
+    'yearly_order': (0, 20),
+    'alpha': (0, 1e6),
+    'interval_width': (0, 1),
+    'season_length': (1, 24 * 366)
+}
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving while it runs share its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Return (result, shared), where shared is True if another caller computed the result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result(), True
+        try:
+            result = function()
+            call.set_result(result)
+            return result, False
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Exclusive lock on path shared by every process on the host"""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+class ForecastService:
+    """Forecasts for API requests, fitting each distinct series once.
+
+    Fitted models go to a ModelCache; with cache_dir set it is on disk and shared
+    by every worker process. Concurrent requests for the same series in one process
+    are coalesced into a single fit, whatever horizons they ask for, and across
+    processes a per-model file lock makes later workers wait for the first fit and
+    load it from disk. Each request then forecasts its own horizon from the fitted
+    model. Recent forecasts are kept in memory.
+    """
+
+    def __init__(self, cache=None, forecast_cache_size=256):
+        self.cache = cache if cache is not None else forecast_model_cache(
+            maxsize=64, cache_dir=os.getenv('FORECAST_CACHE_DIR'))
+        self.forecasts = ModelCache(maxsize=forecast_cache_size)
+        self.flights = SingleFlight()
+
+    def forecast(self, data, periods=24, backend='prophet', freq='h', model_params=None, include_history=False):
+        """Return (forecast frame, status) where status is 'hit', 'miss' or 'coalesced'"""
+        forecaster = Forecaster(model_params=model_params, cache=self.cache, backend=backend, freq=freq)
+        Forecaster._validate(data)
+        model_key = forecaster._fingerprint(data)
+        key = f"{model_key}-{periods}-{freq}-{int(include_history)}"
+        forecast = self.forecasts.get(key)
+        if forecast is not None:
+            return forecast, 'hit'
+
+        def fit():
+            status = 'hit' if model_key in self.cache else 'miss'
+            if status == 'miss' and self.cache.cache_dir is not None:
+                with _file_lock(os.path.join(self.cache.cache_dir, f"{model_key}.lock")):
+                    # Another worker may have fitted it while this one waited
+                    status = 'hit' if model_key in self.cache else 'miss'
+                    forecaster.train(data)
+            else:
+                forecaster.train(data)
+            return forecaster.model, status
+
+        # Coalesce on the model alone: only the cheap predict depends on the horizon
+        (forecaster.model, status), shared = self.flights.do(model_key, fit)
+        forecast = forecaster.predict(periods=periods, include_history=include_history)[FORECAST_COLUMNS]
+        self.forecasts.put(key, forecast)
+        return forecast, 'coalesced' if shared else status
+
+def _read_frame(columns=None):
+    """Request body as a DataFrame: Arrow IPC, or JSON with columnar or record `data`"""
+    if request.mimetype == ARROW_MIMETYPE:
+        return pa.ipc.open_stream(request.get_data()).read_pandas(), dict(request.args)
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or 'data' not in body:
+        raise ValueError("Request body must be JSON with a 'data' field, or an Arrow stream")
+    options = {**body, **request.args}
+    return pd.DataFrame(options.pop('data'), columns=columns), options
+
+def _bounded(name, value, low, high):
+    value = int(value)
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+def _check_rows(data):
+    if len(data) > MAX_ROWS:
+        raise ValueError(f"At most {MAX_ROWS} rows per request")
+    return data
+
+def _float_list(value):
+    """A list from JSON, or comma-separated numbers from a query parameter"""
+    if isinstance(value, str):
+        value = value.split(',')
+    return [float(item) for item in value]
+
+def _model_params(backend, params):
+    """Check model parameters against the backend's known parameters and ranges"""
+    if params is None:
+        return None
+    if isinstance(params, str):
+        params = json.loads(params)
+    if not isinstance(params, dict):
+        raise ValueError("model_params must be an object")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown forecasting backend: {backend}")
+    defaults = BACKENDS[backend].default_params
+    for name, value in params.items():
+        if name not in defaults:
+            raise ValueError(f"Unknown parameter for the {backend} backend: {name}")
+        default = defaults[name]
+        if isinstance(default, (bool, str)):
+            valid = type(value) is type(default)
+        else:
+            low, high = MODEL_PARAM_RANGES[name]
+            numeric = int if isinstance(default, int) else (int, float)
+            valid = isinstance(value, numeric) and not isinstance(value, bool) and low <= value <= high
+        if not valid:
+            raise ValueError(f"Invalid value for {name}: {value!r}")
+    return params
+
+def _timestamps(values):
+    """Parse ISO strings, or numbers as epoch milliseconds"""
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values, unit='ms')
+    return pd.to_datetime(values)
+
+def _wants_arrow():
+    if request.args.get('format') == 'arrow':
+        return True
+    return request.accept_mimetypes.best_match(['application/json', ARROW_MIMETYPE]) == ARROW_MIMETYPE
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=lambda value: value.tolist(), separators=(',', ':'))
+
+def encode_frame(frame, metadata=None, headers=None):
+    """Columnar response: an Arrow IPC stream if the client accepts it, else JSON.
+
+    JSON is {"columns": [...], "data": {column: [values]}, **metadata} with
+    timestamps as epoch milliseconds.
+    """
+    if _wants_arrow():
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({**table.schema.metadata, b'metadata': _dumps(metadata)})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue(), mimetype=ARROW_MIMETYPE, headers=headers)
+
+    data = {}
+    for column in frame.columns:
+        values = frame[column].to_numpy()
+        if np.issubdtype(values.dtype, np.datetime64):
+            values = values.astype('datetime64[ms]').astype(np.int64)
+        data[column] = values
+    payload = {'columns': list(frame.columns), 'data': data, **(metadata or {})}
+    return Response(_dumps(payload), mimetype='application/json', headers=headers)
+
+def _error(message, status=400):
+    return Response(_dumps({'error': message}), status=status, mimetype='application/json')
+
+api = Blueprint('api', __name__)
+_service = None
+_service_lock = threading.Lock()
+
+def forecast_service():
+    """The process-wide ForecastService, created on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ForecastService()
+        return _service
+
+@api.route('/api/forecast', methods=['POST'])
+def api_forecast():
+    """Forecast a 'ds'/'y' series.
+
+    Options (JSON fields or query parameters): periods, backend, freq,
+    model_params and include_history.
+    """
+    try:
+        data, options = _read_frame()
+        data = _check_rows(data)[['ds', 'y']].assign(ds=lambda frame: _timestamps(frame['ds']),
+                                        y=lambda frame: frame['y'].astype(float))
+        forecast, status = forecast_service().forecast(
+            data,
+            periods=_bounded('periods', options.get('periods', 24), 1, MAX_PERIODS),
+            backend=options.get('backend', 'prophet'),
+            freq=options.get('freq', 'h'),
+            model_params=_model_params(options.get('backend', 'prophet'), options.get('model_params')),
+            include_history=str(options.get('include_history', False)).lower() in ('1', 'true')
+        )
+    except RequestEntityTooLarge:
+        return _error("Request body too large", 413)
+    except (ValueError, KeyError, TypeError) as e:
+        return _error(f"Invalid forecast request: {e}")
+    except Exception as e:
+        logging.error(f"Error serving forecast: {e}")
+        return _error("Forecast failed", 500)
+    return encode_frame(forecast, headers={'X-Cache': status})
+
+@api.route('/api/load_balance', methods=['POST'])
+def api_load_balance():
+    """Dispatch a batch of request loads over num_servers servers with a strategy.
+
+    data holds the request loads (and ips for ip_hash); options are strategy,
+    num_servers, weights and seed. Returns the server, simulated load and response
+    time of every request, with per-server metrics and latency percentiles.
+    """
+    try:
+        data, options = _read_frame()
+        if 'load' not in _check_rows(data).columns:
+            raise ValueError("data needs a 'load' column")
+        seed = options.get('seed')
+        load_balancer = LoadBalancer(num_servers=_bounded('num_servers', options.get('num_servers', 3), 1, MAX_SERVERS),
+                                     seed=int(seed) if seed is not None else None)
+        if options.get('weights') is not None:
+            load_balancer.weights = _float_list(options['weights'])
+        ips = None
+        if 'ip' in data.columns:
+            # Integer IPs (packed IPv4) hash the same as their decimal strings, and much faster
+            ips = data['ip'].to_numpy() if pd.api.types.is_integer_dtype(data['ip']) else data['ip'].astype(str).to_numpy()
+        servers, loads, response_times = load_balancer.dispatch_batch(
+            options.get('strategy', 'round_robin'), data['load'].to_numpy(dtype=float), ips)
+        latency = load_balancer.get_latency_sketch()
+        metadata = {
+            'metrics': load_balancer.get_server_metrics(),
+            'latency': dict(zip(['p50', 'p95', 'p99'], latency.quantiles([0.5, 0.95, 0.99]).tolist()))
+        }
+        frame = pd.DataFrame({'server': servers, 'load': loads, 'response_time': response_times})
+    except RequestEntityTooLarge:
+        return _error("Request body too large", 413)
+    except (ValueError, KeyError, TypeError) as e:
+        return _error(f"Invalid load balancing request: {e}")
+    except Exception as e:
+        logging.error(f"Error serving load balancing: {e}")
+        return _error("Load balancing failed", 500)
+    return encode_frame(frame, metadata)
+
+def create_app():
+    """Flask app serving only the API, e.g. `gunicorn 'app.api:create_app()'`"""
+    flask_app = Flask(__name__)
+    flask_app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    flask_app.register_blueprint(api)
+    return flask_app
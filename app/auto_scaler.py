@@ -1,10 +1,43 @@
+import logging
+import math
+import time
+from collections import deque
+
 import numpy as np
+import pandas as pd
+
+SCALING_MODES = ('reactive', 'predictive')
+LOAD_STATS = ('mean', 'ewma', 'p95')
+
 class AutoScaler:
     import numpy as np
-    def __init__(self, load_balancer, scale_up_threshold, scale_down_threshold):
+    def __init__(self, load_balancer, scale_up_threshold, scale_down_threshold, mode='reactive', forecaster=None,
+                 capacity_per_server=100, target_utilization=0.7, horizon=6, use_upper=True, min_servers=1,
+                 max_servers=100, scale_down_margin=1, cooldown_up=300, cooldown_down=900, clock=time.monotonic,
+                 load_stat='mean'):
+        if mode not in SCALING_MODES:
+            raise ValueError(f"Unknown scaling mode: {mode}")
+        if load_stat not in LOAD_STATS:
+            raise ValueError(f"Unknown load statistic: {load_stat}")
         self.load_balancer = load_balancer
         self.scale_up_threshold = scale_up_threshold
         self.scale_down_threshold = scale_down_threshold
+        self.mode = mode
+        self.load_stat = load_stat  # Reactive mode: statistic of each server's load window compared to the thresholds
+        # Predictive mode: capacity_per_server is the forecast load one server carries at 100%
+        self.forecaster = forecaster
+        self.capacity_per_server = capacity_per_server
+        self.target_utilization = target_utilization
+        self.horizon = horizon
+        self.use_upper = use_upper
+        self.min_servers = min_servers
+        self.max_servers = max_servers
+        self.scale_down_margin = scale_down_margin  # Spare servers tolerated before scaling down
+        self.cooldown_up = cooldown_up  # Seconds after any scaling before scaling up again
+        self.cooldown_down = cooldown_down  # Seconds after any scaling before scaling down
+        self.clock = clock
+        self.last_scaled = None
+        self.decisions = deque(maxlen=1000)
 
     def scale_up(self):
         """Add a new server to the load balancer"""
@@ -15,15 +48,86 @@ class AutoScaler:
         if self.load_balancer.num_servers > 1:
             self.load_balancer.num_servers -= 1
 
-    def check_and_scale(self):
-        """Check server loads and scale up/down as needed"""
-        avg_loads = [np.mean(loads) for loads in self.load_balancer.server_loads.values() if loads]
-        if not avg_loads:
+    def scale_to(self, num_servers, reason=''):
+        """Set the server count, within min_servers..max_servers, and log the decision"""
+        current = self.load_balancer.num_servers
+        target = min(max(num_servers, self.min_servers), self.max_servers)
+        if target == current:
+            return None
+        self.load_balancer.num_servers = target
+        self.last_scaled = self.clock()
+        decision = {'time': self.last_scaled, 'mode': self.mode, 'from': current, 'to': target, 'reason': reason}
+        self.decisions.append(decision)
+        logging.info(f"Scaling {current} -> {target} servers ({self.mode}): {reason}")
+        return decision
+
+    def _in_cooldown(self, scaling_up):
+        if self.last_scaled is None:
+            return False
+        cooldown = self.cooldown_up if scaling_up else self.cooldown_down
+        return self.clock() - self.last_scaled < cooldown
+
+    def required_servers(self, forecast):
+        """Servers needed to keep the forecast peak at the target utilization"""
+        demand = forecast['yhat_upper' if self.use_upper else 'yhat'].to_numpy()
+        if not len(demand):
+            return self.load_balancer.num_servers
+        peak = max(float(np.max(demand)), 0.0)
+        return math.ceil(peak / (self.capacity_per_server * self.target_utilization))
+
+    def _upcoming(self, forecast, now):
+        """The next `horizon` forecast rows after now (the end of the training data by default)"""
+        if now is None and self.forecaster is not None and self.forecaster.history is not None:
+            now = self.forecaster.history['ds'].max()
+        if now is not None:
+            forecast = forecast[forecast['ds'] > pd.Timestamp(now)]
+        return forecast.head(self.horizon)
+
+    def check_and_scale(self, forecast=None, now=None):
+        """Check server loads, or the load forecast in predictive mode, and scale as needed"""
+        if self.mode == 'predictive':
+            return self._check_forecast(forecast, now)
+
+        # Sliding-window statistics are kept as requests are recorded, so this is O(servers)
+        windows = self.load_balancer.load_windows
+        window_loads = [self._window_load(windows[server]) for server in range(self.load_balancer.num_servers)
+                        if server in windows and windows[server]]
+        if not window_loads:
             return
 
-        max_load = max(avg_loads)
+        max_load = max(window_loads)
 
         if max_load > self.scale_up_threshold:
             self.scale_up()
         elif max_load < self.scale_down_threshold:
-            self.scale_down()
\ No newline at end of file
+            self.scale_down()
+
+    def _window_load(self, window):
+        if self.load_stat == 'ewma':
+            return window.ewma
+        if self.load_stat == 'p95':
+            return window.quantile(0.95)
+        return window.mean()
+
+    def _check_forecast(self, forecast, now):
+        if forecast is None:
+            if self.forecaster is None or self.forecaster.forecast is None:
+                raise ValueError("Predictive scaling needs a forecast or a Forecaster that has run predict()")
+            forecast = self.forecaster.forecast
+        upcoming = self._upcoming(forecast, now)
+        if not len(upcoming):
+            logging.warning("No forecast rows ahead of now; not scaling")
+            return None
+
+        current = self.load_balancer.num_servers
+        required = min(max(self.required_servers(upcoming), self.min_servers), self.max_servers)
+        scaling_up = required > current
+        # Hysteresis: scale down only once enough servers are spare
+        if not scaling_up and current - required <= self.scale_down_margin:
+            return None
+        if self._in_cooldown(scaling_up):
+            return None
+        column = 'yhat_upper' if self.use_upper else 'yhat'
+        reason = (f"peak {column} {upcoming[column].max():.1f} over the next {len(upcoming)} periods "
+                  f"at {self.target_utilization:.0%} of {self.capacity_per_server} per server")
+        return self.scale_to(required, reason)
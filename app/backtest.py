@@ -0,0 +1,124 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import forecaster as forecaster_module
+from .forecast_backends import FORECAST_COLUMNS, model_to_json, model_from_json
+from .forecaster import Forecaster, _run_tasks, forecast_model_cache
+
+def _backtest_task(task, data=None):
+    """Fit (unless a cached model is given) on the rows before one cutoff and forecast past it"""
+    key, end, horizon, freq, backend, model_params, model_json = task
+    try:
+        if model_json is None:
+            data = data if data is not None else forecaster_module._worker_series
+            forecaster = Forecaster(model_params=model_params, backend=backend, freq=freq)
+            forecaster.train(data[:end])
+            model_json = model_to_json(forecaster.model)
+            model = forecaster.model
+        else:
+            model = model_from_json(model_json)
+        forecast = model.predict(periods=horizon, freq=freq, include_history=False)
+        return key, model_json, forecast[FORECAST_COLUMNS], None
+    except Exception as e:
+        return key, None, None, f"{type(e).__name__}: {e}"
+
+class Backtester:
+    """Rolling-origin backtests of a Forecaster configuration.
+
+    Every cutoff gets one fit on the rows up to it and one forecast of the longest
+    horizon, which is scored at every step of that horizon. Cutoffs are placed by
+    max_horizon rather than the run's horizon, and fits go through the model cache,
+    so re-running with other horizons up to max_horizon, or other metrics, does not
+    refit. Without a cache the backtester keeps its own, grown to hold every cutoff.
+    """
+
+    def __init__(self, backend='prophet', model_params=None, cache=None, freq='h', max_horizon=None):
+        self._owns_cache = cache is None
+        if cache is None:
+            cache = forecast_model_cache()
+        self.forecaster = Forecaster(model_params=model_params, cache=cache, backend=backend, freq=freq)
+        self.max_horizon = max_horizon  # Longest horizon the cutoffs leave room for; default the run's horizon
+        self.errors = {}  # cutoff -> error message from the last run
+
+    def cutoffs(self, data, horizon=24, initial=None, period=None, num_cutoffs=None):
+        """Row counts of the training windows, oldest first.
+
+        With H = max_horizon (or horizon if it is not set), cutoffs are `period` rows
+        apart (default H / 2), the first leaves at least `initial` rows for training
+        (default 3 * H) and the last leaves H rows to score. num_cutoffs keeps only
+        the most recent ones.
+        """
+        if self.max_horizon is not None and horizon > self.max_horizon:
+            raise ValueError(f"horizon {horizon} is longer than max_horizon {self.max_horizon}")
+        anchor = self.max_horizon or horizon
+        initial = initial or 3 * anchor
+        period = period or max(anchor // 2, 1)
+        ends = list(range(len(data) - anchor, initial - 1, -period))[::-1]
+        return ends[-num_cutoffs:] if num_cutoffs else ends
+
+    def run(self, data, horizon=24, initial=None, period=None, num_cutoffs=None, max_workers=None):
+        """Backtest on a 'ds'/'y' frame and return one row per cutoff and horizon step.
+
+        The frame has cutoff (last training timestamp), step, ds, y, yhat, yhat_lower
+        and yhat_upper columns. Cutoffs that fail are left out and reported in
+        self.errors.
+        """
+        self.forecaster._validate(data)
+        data = data[['ds', 'y']].sort_values('ds', ignore_index=True)
+        ends = self.cutoffs(data, horizon, initial, period, num_cutoffs)
+        if not ends:
+            raise ValueError("Not enough data for a single cutoff")
+
+        cache = self.forecaster.cache
+        if self._owns_cache and cache.maxsize < len(ends):
+            cache.maxsize = len(ends)
+        fingerprints = {end: self.forecaster._fingerprint(data[:end]) for end in ends}
+        tasks = []
+        for end in ends:
+            cached_model = cache.get(fingerprints[end])
+            model_json = None if cached_model is None else model_to_json(cached_model)
+            tasks.append((end, end, horizon, self.forecaster.freq, self.forecaster.backend,
+                          self.forecaster.model_params, model_json))
+
+        self.errors = {}
+        frames = []
+        for end, model_json, forecast, error in _run_tasks(_backtest_task, tasks, max_workers, data):
+            cutoff = data['ds'].iloc[end - 1]
+            if error is not None:
+                logging.error(f"Error backtesting cutoff {cutoff}: {error}")
+                self.errors[cutoff] = error
+                continue
+            if fingerprints[end] not in cache:
+                cache.put(fingerprints[end], model_from_json(model_json))
+            frames.append(forecast.assign(cutoff=cutoff, step=np.arange(1, len(forecast) + 1)))
+
+        columns = ['cutoff', 'step', 'ds', 'y', 'yhat', 'yhat_lower', 'yhat_upper']
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        results = pd.concat(frames, ignore_index=True).merge(data, on='ds', how='left')
+        return results[columns]
+
+    @staticmethod
+    def horizon_metrics(results):
+        """MAE, RMSE, MAPE and interval coverage per horizon step of run() results"""
+        results = results.dropna(subset=['y'])
+        error = results['yhat'] - results['y']
+        nonzero = results['y'] != 0
+        frame = pd.DataFrame({
+            'step': results['step'],
+            'abs_error': error.abs(),
+            'squared_error': error ** 2,
+            'abs_pct_error': (error.abs() / results['y'].abs()).where(nonzero) * 100,
+            'covered': results['y'].between(results['yhat_lower'], results['yhat_upper'])
+        })
+        metrics = frame.groupby('step').agg(
+            MAE=('abs_error', 'mean'),
+            RMSE=('squared_error', 'mean'),
+            MAPE=('abs_pct_error', 'mean'),
+            coverage=('covered', 'mean'),
+            count=('abs_error', 'size')
+        )
+        metrics['RMSE'] = np.sqrt(metrics['RMSE'])
+        return metrics
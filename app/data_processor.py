@@ -1,17 +1,46 @@
+import os
+
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
 from datetime import datetime, timedelta
+from .rollup import DEFAULT_RESOLUTIONS, RollupStore
+from .sketch import SignedDDSketch
+
+# Metric columns that are clipped to their IQR bounds
+METRIC_COLUMNS = ['active_users', 'server_load', 'response_time']
 
 class DataProcessor:
     def __init__(self):
         self.data = None
+        self.bounds = {}  # column -> (lower, upper) outlier bounds from the last preprocessing
+        self.rollups = None  # RollupStore of the preprocessed data, from build_rollups()
+
+    @property
+    def data(self):
+        # Rows added by append() are joined on first access rather than on every append
+        if self._pending:
+            self._data = pd.concat([self._data, *self._pending], ignore_index=True)
+            self._pending = []
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        self._pending = []  # Preprocessed chunks from append() not yet joined to _data
+        self._sketches = None  # column -> SignedDDSketch of every value seen, for append()
+        self._last_row = None
+        self._preprocessed = False  # Whether _data went through preprocess_data()
 
-    def generate_sample_data(self, days=90):
+    def generate_sample_data(self, days=90, freq='h'):
         """Generate sample application usage data"""
         date_rng = pd.date_range(
             start=datetime.now() - timedelta(days=days),
             end=datetime.now(),
-            freq='h'
+            freq=freq
         )
 
         # Generate synthetic data
@@ -37,8 +66,79 @@ class DataProcessor:
         self.data = pd.DataFrame(data)
         return self.data
 
+    def load_data(self, path, columns=None, start=None, end=None, rename=None, memory_map=True):
+        """Load exported telemetry from Parquet or CSV.
+
+        Only the timestamp and metric columns (or the given file columns) are read,
+        and only rows with start <= timestamp < end. For Parquet the time range is
+        pushed down to skip row groups and files; path may be a file or a directory
+        of Parquet files. rename maps file column names to the names used here,
+        e.g. {'time': 'timestamp', 'cpu': 'server_load'}. Metrics are read as float32
+        and the result, sorted by timestamp, is also stored in self.data.
+        """
+        rename = rename or {}
+        file_names = {rename.get(name, name): name for name in self._schema(path).names}
+        if 'timestamp' not in file_names:
+            raise ValueError("Data must contain a timestamp column (use rename to map it)")
+        if columns is None:
+            columns = [file_names[name] for name in ['timestamp', *METRIC_COLUMNS] if name in file_names]
+        timestamp_col = file_names['timestamp']
+        if timestamp_col not in columns:
+            columns = [timestamp_col, *columns]
+
+        row_filter = None
+        if start is not None:
+            row_filter = pc.field(timestamp_col) >= pd.Timestamp(start).to_pydatetime()
+        if end is not None:
+            upper = pc.field(timestamp_col) < pd.Timestamp(end).to_pydatetime()
+            row_filter = upper if row_filter is None else row_filter & upper
+
+        if self._is_csv(path):
+            table = self._read_csv(path, columns, row_filter, memory_map)
+        else:
+            filesystem = pa.fs.LocalFileSystem(use_mmap=memory_map)
+            dataset = pa_ds.dataset(path, format='parquet', filesystem=filesystem)
+            table = dataset.to_table(columns=columns, filter=row_filter)
+
+        table = table.rename_columns([rename.get(name, name) for name in table.column_names])
+        metrics = [name for name in table.column_names if name in METRIC_COLUMNS]
+        table = table.cast(pa.schema([
+            field.with_type(pa.float32()) if field.name in metrics else field for field in table.schema
+        ]))
+        data = table.to_pandas(self_destruct=True)
+        if not data['timestamp'].is_monotonic_increasing:
+            data = data.sort_values('timestamp', ignore_index=True)
+        self.data = data
+        return self.data
+
+    @staticmethod
+    def _is_csv(path):
+        return os.path.splitext(str(path))[1].lower() in ('.csv', '.gz', '.bz2')
+
+    def _schema(self, path):
+        if self._is_csv(path):
+            with pa_csv.open_csv(path) as reader:
+                return reader.schema
+        return pa_ds.dataset(path, format='parquet').schema
+
+    @staticmethod
+    def _read_csv(path, columns, row_filter, memory_map):
+        """Stream a CSV in record batches, keeping only the wanted columns and rows"""
+        source = pa.memory_map(str(path)) if memory_map and not str(path).endswith(('.gz', '.bz2')) else str(path)
+        convert_options = pa_csv.ConvertOptions(include_columns=columns)
+        with pa_csv.open_csv(source, convert_options=convert_options) as reader:
+            tables = []
+            for batch in reader:
+                table = pa.Table.from_batches([batch])
+                tables.append(table if row_filter is None else table.filter(row_filter))
+            return pa.concat_tables(tables) if tables else reader.schema.empty_table()
+
     def preprocess_data(self, data=None):
-        """Preprocess the data for modeling"""
+        """Preprocess the data for modeling.
+
+        Metrics become float32 clipped to their IQR bounds and the calendar features
+        int8. The input frame is copied once and then modified in place.
+        """
         if data is not None:
             self.data = data
 
@@ -46,26 +146,144 @@ class DataProcessor:
             self.data = self.generate_sample_data()
 
         # Handle missing values using ffill instead of fillna(method='ffill')
-        self.data = self.data.ffill()
-
-        # Handle outliers using IQR method
-        for column in ['active_users', 'server_load', 'response_time']:
-            Q1 = self.data[column].quantile(0.25)
-            Q3 = self.data[column].quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
-            self.data[column] = self.data[column].clip(lower_bound, upper_bound)
-
-        # Feature engineering
-        self.data['hour'] = self.data['timestamp'].dt.hour
-        self.data['day_of_week'] = self.data['timestamp'].dt.dayofweek
-        self.data['is_weekend'] = self.data['day_of_week'].isin([5, 6]).astype(int)
+        self.data = self._downcast_ffill(self.data)
+        columns = [column for column in METRIC_COLUMNS if column in self.data.columns]
 
+        # Handle outliers using IQR method, with every column's quartiles in one call
+        quartiles = self.data[columns].quantile([0.25, 0.75])
+        self.bounds = self._iqr_bounds(quartiles.loc[0.25], quartiles.loc[0.75])
+        self._clip(self.data, columns)
+        self._add_calendar_features(self.data)
+        self._preprocessed = True
         return self.data
 
-    def prepare_prophet_data(self, target_column='active_users'):
-        """Prepare data for Prophet model"""
+    def append(self, new_rows):
+        """Preprocess only new_rows and add them to the preprocessed data.
+
+        Gaps at the start of new_rows are filled from the last processed row and the
+        IQR bounds come from streaming quartile sketches (within 1% of each quartile's
+        magnitude, for metrics of either sign) updated with the new values, so the
+        cost depends on len(new_rows), not the history. Rows already processed keep
+        the bounds they were clipped with. Data set by generate_sample_data() or
+        load_data() is preprocessed in full first. Returns the processed new rows.
+        """
+        if self._data is None:
+            return self.preprocess_data(new_rows)
+        if not self._preprocessed:
+            self.preprocess_data()
+        if self._sketches is None:
+            # Clipping keeps the order of values, so the clipped history has the same quartiles
+            self._sketches = {}
+            for column in self.bounds:
+                self._sketches[column] = SignedDDSketch()
+                self._sketches[column].add_many(self._data[column].to_numpy())
+            self._last_row = self._data.iloc[-1]
+
+        chunk = self._downcast_ffill(new_rows)
+        if len(chunk) and chunk.iloc[0].isna().any():
+            chunk = chunk.fillna(self._last_row[chunk.columns])
+        columns = [column for column in self.bounds if column in chunk.columns]
+        for column in columns:
+            self._sketches[column].add_many(chunk[column].dropna().to_numpy())
+        quartiles = pd.DataFrame({column: self._sketches[column].quantiles([0.25, 0.75]) for column in columns})
+        self.bounds.update(self._iqr_bounds(quartiles.iloc[0], quartiles.iloc[1]))
+        self._clip(chunk, columns)
+        self._add_calendar_features(chunk)
+
+        if len(chunk):
+            self._pending.append(chunk)
+            self._last_row = chunk.iloc[-1]
+            if self.rollups is not None:
+                self.rollups.add(chunk)
+        return chunk
+
+    def build_rollups(self, resolutions=DEFAULT_RESOLUTIONS):
+        """Aggregate the preprocessed data at each resolution; append() keeps the rollups current"""
+        if self.data is None or not self._preprocessed:
+            self.preprocess_data()
+        self.rollups = RollupStore(list(self.bounds), resolutions)
+        self.rollups.add(self.data)
+        return self.rollups
+
+    @staticmethod
+    def _iqr_bounds(q1, q3):
+        iqr = q3 - q1
+        return {column: (q1[column] - 1.5 * iqr[column], q3[column] + 1.5 * iqr[column]) for column in q1.index}
+
+    @staticmethod
+    def _downcast_ffill(frame):
+        """Forward-filled copy of frame with float32 metrics, built a column at a time"""
+        columns = {}
+        for column in frame.columns:
+            series = frame[column]
+            if column in METRIC_COLUMNS:
+                series = series.astype(np.float32)
+            columns[column] = series.ffill()
+        return pd.DataFrame(columns, index=frame.index)
+
+    def _clip(self, frame, columns):
+        """Clip metric columns to self.bounds"""
+        for column in columns:
+            lower, upper = self.bounds[column]
+            frame[column] = np.clip(frame[column].to_numpy(), float(lower), float(upper))
+
+    @staticmethod
+    def _add_calendar_features(frame):
+        """Add int8 hour, day_of_week and is_weekend columns"""
+        timestamps = frame['timestamp'].dt
+        frame['hour'] = timestamps.hour.astype(np.int8)
+        frame['day_of_week'] = timestamps.dayofweek.astype(np.int8)
+        frame['is_weekend'] = (frame['day_of_week'] >= 5).astype(np.int8)
+
+    @staticmethod
+    def _ffill_chunks(chunks):
+        """Forward-fill a sequence of frames as if they were one, casting metrics to float32"""
+        last_row = None
+        for chunk in chunks:
+            chunk = DataProcessor._downcast_ffill(chunk)
+            if last_row is not None and len(chunk) and chunk.iloc[0].isna().any():
+                chunk = chunk.fillna(last_row)  # Leading gaps take the previous chunk's last values
+            if len(chunk):
+                last_row = chunk.iloc[-1]
+            yield chunk
+
+    def preprocess_chunks(self, chunk_source, relative_accuracy=0.01):
+        """Preprocess data that does not fit in memory, yielding processed chunks.
+
+        chunk_source is a callable returning a fresh iterable of frames each time,
+        e.g. `lambda: pd.read_csv(path, parse_dates=['timestamp'], chunksize=1_000_000)`.
+        A first pass sketches every metric's distribution to find the IQR bounds
+        (quartiles within relative_accuracy of their magnitude) and a second
+        pass ffills, clips and adds calendar features chunk by chunk.
+        """
+        sketches = {}
+        for chunk in self._ffill_chunks(chunk_source()):
+            for column in METRIC_COLUMNS:
+                if column in chunk.columns:
+                    sketches.setdefault(column, SignedDDSketch(relative_accuracy)).add_many(chunk[column].dropna())
+        quartiles = pd.DataFrame({column: sketch.quantiles([0.25, 0.75]) for column, sketch in sketches.items()})
+        self.bounds = self._iqr_bounds(quartiles.iloc[0], quartiles.iloc[1])
+
+        for chunk in self._ffill_chunks(chunk_source()):
+            self._clip(chunk, list(sketches))
+            self._add_calendar_features(chunk)
+            yield chunk
+
+    def prepare_prophet_data(self, target_column='active_users', freq=None):
+        """Prepare data for Prophet model.
+
+        With freq (e.g. '1h' or '1D') and rollups built, y is the mean per freq
+        period, read from the coarsest rollup that is at least as fine as freq.
+        """
+        if freq is not None and self.rollups is not None:
+            resolution = self.rollups.resolution_for(freq=freq)
+            rollup = self.rollups.get(resolution)[[f'{target_column}_mean', f'{target_column}_count']]
+            if resolution != pd.Timedelta(freq):
+                # Combine finer buckets into freq periods, weighting each mean by its count
+                total = (rollup.iloc[:, 0] * rollup.iloc[:, 1]).resample(freq).sum()
+                count = rollup.iloc[:, 1].resample(freq).sum()
+                rollup = pd.DataFrame({f'{target_column}_mean': total / count}).dropna()
+            return pd.DataFrame({'ds': rollup.index, 'y': rollup[f'{target_column}_mean'].to_numpy()})
         if self.data is None:
             self.preprocess_data()
         prophet_data = self.data[['timestamp', target_column]].copy()
@@ -0,0 +1,216 @@
+import json
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+FORECAST_COLUMNS = ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+
+def _future_dates(last_date, periods, freq):
+    """Timestamps after last_date, as Prophet's make_future_dataframe builds them"""
+    dates = pd.date_range(start=last_date, periods=periods + 1, freq=freq)
+    return dates[dates > last_date][:periods]
+
+class ProphetModel:
+    """Prophet behind the forecasting backend interface"""
+
+    name = 'prophet'
+    default_params = {
+        'yearly_seasonality': True,
+        'weekly_seasonality': True,
+        'daily_seasonality': True,
+        'seasonality_mode': 'multiplicative'
+    }
+
+    def __init__(self, **params):
+        # Prophet is slow to import, so only load it when this backend is used
+        from prophet import Prophet
+        self.params = {**self.default_params, **params}
+        self.model = Prophet(**self.params)
+
+    def fit(self, data, init=None):
+        if init is None:
+            self.model.fit(data)
+        else:
+            self.model.fit(data, init=init)
+        return self
+
+    def predict(self, periods=24, freq='h', include_history=True):
+        future = self.model.make_future_dataframe(periods=periods, freq=freq, include_history=include_history)
+        return self.model.predict(future)
+
+    def warm_start_params(self):
+        """Fitted parameters in the form Stan accepts as initial values"""
+        params = self.model.params
+        return {
+            'k': params['k'][0][0],
+            'm': params['m'][0][0],
+            'sigma_obs': params['sigma_obs'][0][0],
+            'delta': params['delta'][0],
+            'beta': params['beta'][0]
+        }
+
+    def plot_components(self, forecast):
+        return self.model.plot_components(forecast)
+
+    def get_state(self):
+        from prophet.serialize import model_to_json
+        return model_to_json(self.model)
+
+    def set_state(self, state):
+        from prophet.serialize import model_from_json
+        self.model = model_from_json(state)
+
+class FourierRidgeModel:
+    """Linear trend plus daily, weekly and yearly Fourier terms, fitted by ridge regression.
+
+    The fit is one closed-form solve over a handful of features, so 90 days of
+    hourly data takes milliseconds. Intervals assume normal residuals with a
+    constant spread.
+    """
+
+    name = 'fourier_ridge'
+    default_params = {
+        'daily_order': 4,
+        'weekly_order': 3,
+        'yearly_order': 0,
+        'alpha': 1.0,
+        'interval_width': 0.8
+    }
+
+    def __init__(self, **params):
+        self.params = {**self.default_params, **params}
+        self.coef = None
+        self.sigma = None
+        self._start = None
+        self._span = None
+        self._history_ds = None
+
+    def _days(self, ds):
+        return (np.asarray(ds, dtype='datetime64[ns]') - self._start) / np.timedelta64(1, 'D')
+
+    def _features(self, days):
+        columns = [np.ones_like(days), days / self._span]
+        for period, order in ((1.0, self.params['daily_order']),
+                              (7.0, self.params['weekly_order']),
+                              (365.25, self.params['yearly_order'])):
+            if order:
+                angles = 2 * np.pi * np.outer(days / period, np.arange(1, order + 1))
+                columns.extend((np.sin(angles), np.cos(angles)))
+        return np.column_stack(columns)
+
+    def fit(self, data, init=None):
+        data = data[data['y'].notna()]
+        if len(data) < 2:
+            raise ValueError("Dataframe has less than 2 non-NaN rows.")
+        ds = pd.to_datetime(data['ds']).to_numpy(dtype='datetime64[ns]')
+        y = data['y'].to_numpy(dtype=float)
+        self._start = ds.min()
+        days = self._days(ds)
+        self._span = max(days.max(), 1.0)
+
+        features = self._features(days)
+        penalty = self.params['alpha'] * np.eye(features.shape[1])
+        penalty[0, 0] = 0  # Leave the intercept unpenalized
+        self.coef = np.linalg.solve(features.T @ features + penalty, features.T @ y)
+        residuals = y - features @ self.coef
+        self.sigma = float(np.sqrt(np.mean(residuals ** 2)))
+        self._history_ds = np.unique(ds)
+        return self
+
+    def predict(self, periods=24, freq='h', include_history=True):
+        ds = _future_dates(self._history_ds[-1], periods, freq).to_numpy(dtype='datetime64[ns]')
+        if include_history:
+            ds = np.concatenate((self._history_ds, ds))
+        yhat = self._features(self._days(ds)) @ self.coef
+        margin = NormalDist().inv_cdf(0.5 + self.params['interval_width'] / 2) * self.sigma
+        return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - margin, 'yhat_upper': yhat + margin})
+
+    def warm_start_params(self):
+        return None  # The closed-form fit has nothing to warm-start
+
+    def get_state(self):
+        return {
+            'coef': self.coef.tolist(),
+            'sigma': self.sigma,
+            'start': int(self._start.astype(np.int64)),
+            'span': self._span,
+            'history_ds': self._history_ds.astype(np.int64).tolist()
+        }
+
+    def set_state(self, state):
+        self.coef = np.array(state['coef'])
+        self.sigma = state['sigma']
+        self._start = np.datetime64(state['start'], 'ns')
+        self._span = state['span']
+        self._history_ds = np.array(state['history_ds'], dtype='datetime64[ns]')
+
+class SeasonalNaiveModel:
+    """Forecast each point as the value one season earlier.
+
+    Intervals come from the spread of the season-over-season differences and widen
+    with every extra season ahead.
+    """
+
+    name = 'seasonal_naive'
+    default_params = {'season_length': 24, 'interval_width': 0.8}
+
+    def __init__(self, **params):
+        self.params = {**self.default_params, **params}
+        self._history_ds = None
+        self._y = None
+        self.sigma = None
+
+    def fit(self, data, init=None):
+        data = data[data['y'].notna()].sort_values('ds')
+        if len(data) < 2:
+            raise ValueError("Dataframe has less than 2 non-NaN rows.")
+        self._history_ds = pd.to_datetime(data['ds']).to_numpy(dtype='datetime64[ns]')
+        self._y = data['y'].to_numpy(dtype=float)
+        season = min(self.params['season_length'], len(self._y) - 1)
+        self.sigma = float(np.std(self._y[season:] - self._y[:-season]))
+        return self
+
+    def predict(self, periods=24, freq='h', include_history=True):
+        y = self._y
+        season = min(self.params['season_length'], len(y) - 1)
+        fitted = np.concatenate((y[:season], y[:-season]))
+        steps = np.arange(periods)
+        future = y[len(y) - season + steps % season]
+        margin = NormalDist().inv_cdf(0.5 + self.params['interval_width'] / 2) * self.sigma
+        margins = margin * np.sqrt(steps // season + 1)
+        ds = _future_dates(self._history_ds[-1], periods, freq).to_numpy(dtype='datetime64[ns]')
+        yhat = future
+        if include_history:
+            margins = np.concatenate((np.full(len(y), margin), margins))
+            ds = np.concatenate((self._history_ds, ds))
+            yhat = np.concatenate((fitted, future))
+        return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - margins, 'yhat_upper': yhat + margins})
+
+    def warm_start_params(self):
+        return None
+
+    def get_state(self):
+        return {
+            'history_ds': self._history_ds.astype(np.int64).tolist(),
+            'y': self._y.tolist(),
+            'sigma': self.sigma
+        }
+
+    def set_state(self, state):
+        self._history_ds = np.array(state['history_ds'], dtype='datetime64[ns]')
+        self._y = np.array(state['y'])
+        self.sigma = state['sigma']
+
+BACKENDS = {model.name: model for model in (ProphetModel, FourierRidgeModel, SeasonalNaiveModel)}
+
+def model_to_json(model):
+    """Serialize a fitted backend model, recording which backend it belongs to"""
+    return json.dumps({'backend': model.name, 'params': model.params, 'state': model.get_state()})
+
+def model_from_json(model_json):
+    """Rebuild a fitted backend model from model_to_json() output"""
+    payload = json.loads(model_json)
+    model = BACKENDS[payload['backend']](**payload['params'])
+    model.set_state(payload['state'])
+    return model
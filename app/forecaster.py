@@ -1,48 +1,226 @@
-from prophet import Prophet
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from sklearn.metrics import mean_absolute_error, mean_squared_error
-from sklearn.ensemble import IsolationForest
+from .anomaly import StreamingAnomalyDetector
+from .forecast_backends import BACKENDS, FORECAST_COLUMNS, model_to_json, model_from_json
+from .model_cache import ModelCache, fingerprint
+
+def forecast_model_cache(maxsize=16, cache_dir=None):
+    """Model cache that stores fitted models of any backend as JSON when cache_dir is set"""
+    return ModelCache(maxsize=maxsize, cache_dir=cache_dir, dumps=model_to_json, loads=model_from_json)
+
+# Input series of a train_many() batch, sent once to each worker process
+_worker_series = None
+
+def _init_worker(series_frames):
+    global _worker_series
+    _worker_series = series_frames
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+def _fit_task(task, series_frames=None):
+    """Fit one (series, target) model and return it serialized"""
+    key, series, target, backend, model_params = task
+    try:
+        frame = (series_frames if series_frames is not None else _worker_series)[series]
+        forecaster = Forecaster(model_params=model_params, backend=backend)
+        forecaster.train(frame[['ds', target]].rename(columns={target: 'y'}))
+        return key, model_to_json(forecaster.model), None
+    except Exception as e:
+        return key, None, f"{type(e).__name__}: {e}"
+
+def _predict_task(task, shared=None):
+    """Forecast with one serialized model"""
+    key, model_json, periods, freq = task
+    try:
+        forecast = model_from_json(model_json).predict(periods=periods, freq=freq)
+        return key, forecast[FORECAST_COLUMNS], None
+    except Exception as e:
+        return key, None, f"{type(e).__name__}: {e}"
+
+def _run_tasks(function, tasks, max_workers, shared=None):
+    """Run function(task, shared) for every task on a process pool, or in this process when one worker is enough.
+
+    Workers receive shared once, through the module global read by the task
+    functions. In this process it is passed directly, so concurrent callers (e.g.
+    API threads) never see each other's data.
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+    if max_workers <= 1:
+        return [function(task, shared) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(shared,)) as executor:
+        return list(executor.map(function, tasks))
 
 class Forecaster:
-    def __init__(self):
+    def __init__(self, model_params=None, cache=None, backend='prophet', freq='h'):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown forecasting backend: {backend}")
+        self.backend = backend
+        self.freq = freq  # Spacing of the training data and forecast steps
+        self.model_params = {**BACKENDS[backend].default_params, **(model_params or {})}
+        # Fitted models keyed by training data and parameters, so unchanged data is never refit
+        self.cache = cache if cache is not None else forecast_model_cache()
         self._initialize_model()
+        self.history = None
         self.forecast = None
+        self.models = {}  # (series, target) -> fitted model, from train_many()
+        self.errors = {}  # (series, target) -> error message from the last batch
 
     def _initialize_model(self):
-        """Initialize a new Prophet model"""
+        """Initialize a new model for the configured backend"""
         try:
-            self.model = Prophet(
-                yearly_seasonality=True,
-                weekly_seasonality=True,
-                daily_seasonality=True,
-                seasonality_mode='multiplicative'
-            )
+            self.model = BACKENDS[self.backend](**self.model_params)
         except Exception as e:
-            print(f"Error initializing Prophet model: {e}")
+            print(f"Error initializing {self.backend} model: {e}")
             raise
 
-    def train(self, data):
-        """Train the Prophet model"""
-        try:
-            if not isinstance(data, pd.DataFrame):
-                raise ValueError("Input data must be a pandas DataFrame")
-            if not all(col in data.columns for col in ['ds', 'y']):
-                raise ValueError("Data must contain 'ds' and 'y' columns")
+    def _fingerprint(self, data):
+        return fingerprint(data[['ds', 'y']], {'backend': self.backend, **self.model_params})
+
+    @staticmethod
+    def _validate(data):
+        if not isinstance(data, pd.DataFrame):
+            raise ValueError("Input data must be a pandas DataFrame")
+        if not all(col in data.columns for col in ['ds', 'y']):
+            raise ValueError("Data must contain 'ds' and 'y' columns")
 
+    def _fit(self, data, init=None):
+        """Fit a new model on data, or reuse the cached fit for the same data and configuration"""
+        key = self._fingerprint(data)
+        cached_model = self.cache.get(key)
+        if cached_model is not None:
+            self.model = cached_model
+        else:
             # Initialize new model before training
             self._initialize_model()
-            self.model.fit(data)
+            self.model.fit(data, init=init)
+            self.cache.put(key, self.model)
+        self.history = data[['ds', 'y']].reset_index(drop=True)
+
+    def train(self, data):
+        """Train the forecasting model"""
+        try:
+            self._validate(data)
+            self._fit(data)
             return True
         except Exception as e:
             print(f"Error training model: {e}")
             raise
 
-    def predict(self, periods=24):
+    def update(self, new_rows, max_window=None):
+        """Add new observations and refit, warm-starting from the previous fit.
+
+        max_window caps the training history, either as a number of rows or as a
+        duration such as '60D'.
+        """
+        try:
+            self._validate(new_rows)
+            if self.history is None:
+                history = new_rows[['ds', 'y']]
+                init = None
+            else:
+                history = pd.concat([self.history, new_rows[['ds', 'y']]], ignore_index=True)
+                history = history.drop_duplicates('ds', keep='last').sort_values('ds', ignore_index=True)
+                init = self.model.warm_start_params()
+
+            if isinstance(max_window, int):
+                history = history.tail(max_window)
+            elif max_window is not None:
+                history = history[history['ds'] > history['ds'].max() - pd.Timedelta(max_window)]
+
+            self._fit(history, init=init)
+            return True
+        except Exception as e:
+            print(f"Error updating model: {e}")
+            raise
+
+    def train_many(self, data, targets, series_col=None, timestamp_col='timestamp', max_workers=None):
+        """Fit an independent model per (series, target) on a process pool.
+
+        data is a wide frame with a timestamp column, one column per target and
+        optionally a series_col identifying the service. The input is split once and
+        sent to each worker once. Series whose data matches a model that is already
+        fitted or cached are not refit, and identical series are fitted only once.
+        Failures are collected in self.errors instead of aborting the batch.
+        """
+        targets = list(dict.fromkeys([targets] if isinstance(targets, str) else targets))
+        if series_col is None:
+            groups = {None: data}
+        else:
+            groups = dict(iter(data.groupby(series_col, sort=False)))
+        series_frames = {series: frame[[timestamp_col, *targets]].rename(columns={timestamp_col: 'ds'})
+                         for series, frame in groups.items()}
+
+        self.errors = {}
+        keys_by_fingerprint = {}
+        for series, frame in series_frames.items():
+            for target in targets:
+                model_fingerprint = self._fingerprint(frame[['ds', target]].set_axis(['ds', 'y'], axis=1))
+                keys_by_fingerprint.setdefault(model_fingerprint, []).append((series, target))
+
+        models = {}
+        tasks = []
+        for model_fingerprint, keys in keys_by_fingerprint.items():
+            cached_model = self.cache.get(model_fingerprint)
+            if cached_model is not None:
+                models.update(dict.fromkeys(keys, cached_model))
+            else:
+                series, target = keys[0]
+                tasks.append((model_fingerprint, series, target, self.backend, self.model_params))
+
+        for model_fingerprint, model_json, error in _run_tasks(_fit_task, tasks, max_workers, series_frames):
+            keys = keys_by_fingerprint[model_fingerprint]
+            if error is not None:
+                logging.error(f"Error training models for {keys}: {error}")
+                self.errors.update(dict.fromkeys(keys, error))
+                continue
+            model = model_from_json(model_json)
+            self.cache.put(model_fingerprint, model)
+            models.update(dict.fromkeys(keys, model))
+        self.models.update(models)
+        return models
+
+    def predict_many(self, periods=24, data=None, targets=None, series_col=None, timestamp_col='timestamp',
+                     max_workers=None):
+        """Forecast every (series, target) model and return one long-format frame.
+
+        When data is given the models are trained first with train_many(). The frame
+        has series, target, ds, yhat, yhat_lower and yhat_upper columns; series that
+        fail are left out and reported in self.errors.
+        """
+        if data is not None:
+            models = self.train_many(data, targets, series_col, timestamp_col, max_workers)
+        else:
+            self.errors = {}
+            models = self.models
+
+        # Series that share a fitted model share its forecast too
+        keys_by_model = {}
+        for key, model in models.items():
+            keys_by_model.setdefault(id(model), (model, []))[1].append(key)
+        tasks = [(model_id, model_to_json(model), periods, self.freq) for model_id, (model, _) in keys_by_model.items()]
+
+        frames = []
+        for model_id, forecast, error in _run_tasks(_predict_task, tasks, max_workers):
+            keys = keys_by_model[model_id][1]
+            if error is not None:
+                logging.error(f"Error forecasting {keys}: {error}")
+                self.errors.update(dict.fromkeys(keys, error))
+                continue
+            frames.extend(forecast.assign(series=series, target=target) for series, target in keys)
+
+        columns = ['series', 'target', *FORECAST_COLUMNS]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def predict(self, periods=24, include_history=True):
         """Generate forecasts"""
         try:
-            future = self.model.make_future_dataframe(periods=periods, freq='h')
-            self.forecast = self.model.predict(future)
+            self.forecast = self.model.predict(periods=periods, freq=self.freq, include_history=include_history)
             return self.forecast
         except Exception as e:
             print(f"Error generating forecast: {e}")
@@ -69,16 +247,28 @@ class Forecaster:
         try:
             if self.forecast is None:
                 raise ValueError("Must run predict() before getting components")
+            if not hasattr(self.model, 'plot_components'):
+                raise ValueError(f"The {self.backend} backend has no component plot")
             return self.model.plot_components(self.forecast)
         except Exception as e:
             print(f"Error getting components: {e}")
             raise
 
-    def detect_anomalies(self, forecast_df):
-        """Detect anomalies in the forecasted load"""
+    def detect_anomalies(self, forecast_df, detector=None):
+        """Detect anomalies in the forecasted load.
+
+        Rows are scored in order by a StreamingAnomalyDetector, so a detector that
+        is passed in keeps its state between calls. When the frame has actual values
+        in a 'y' column they are also checked against the forecast band. The
+        'anomaly' column is -1 for anomalies and 1 otherwise.
+        """
         try:
-            model = IsolationForest(contamination=0.1)
-            forecast_df['anomaly'] = model.fit_predict(forecast_df[['yhat']])
+            detector = detector if detector is not None else StreamingAnomalyDetector()
+            if 'y' in forecast_df.columns:
+                flags = detector.update_many(forecast_df['y'], forecast_df['yhat_lower'], forecast_df['yhat_upper'])
+            else:
+                flags = detector.update_many(forecast_df['yhat'])
+            forecast_df['anomaly'] = np.where(flags, -1, 1)
             return forecast_df
         except Exception as e:
             print(f"Error detecting anomalies: {e}")
@@ -0,0 +1,88 @@
+import bisect
+import hashlib
+import numpy as np
+
+RING_SIZE = 2 ** 64
+
+def stable_hash(key):
+    """64-bit hash of a key that is the same in every process (unlike the salted hash())"""
+    return int.from_bytes(hashlib.blake2b(str(key).encode(), digest_size=8).digest(), 'big')
+
+def stable_hashes(keys):
+    """stable_hash of every key, as a uint64 array"""
+    digests = b''.join([hashlib.blake2b(str(key).encode(), digest_size=8).digest() for key in keys])
+    return np.frombuffer(digests, dtype='>u8').astype(np.uint64)
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Every node is placed on the ring `vnodes` times and a key belongs to the first
+    node point clockwise from its hash, so adding or removing one of n nodes only
+    moves about 1/n of the keys. Lookups are a binary search over the points.
+    """
+
+    def __init__(self, nodes=(), vnodes=100):
+        self.vnodes = vnodes
+        self._nodes = set()
+        self._points = np.zeros(0, dtype=np.uint64)
+        self._owners = np.zeros(0, dtype=np.int64)
+        self._point_list = []
+        self.set_nodes(nodes)
+
+    @property
+    def nodes(self):
+        return sorted(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def set_nodes(self, nodes):
+        """Replace the node set and return the fraction of the key space that moved"""
+        nodes = set(nodes)
+        if nodes == self._nodes:
+            return 0.0
+        old_points, old_owners = self._points, self._owners
+
+        points = [(stable_hash(f"{node}#{replica}"), node) for node in nodes for replica in range(self.vnodes)]
+        points.sort()
+        self._nodes = nodes
+        self._points = np.array([point for point, _ in points], dtype=np.uint64)
+        self._owners = np.array([node for _, node in points], dtype=np.int64)
+        self._point_list = self._points.tolist()
+
+        if not len(old_points) or not len(self._points):
+            return 1.0
+        return self._moved_fraction(old_points, old_owners)
+
+    def add_node(self, node):
+        return self.set_nodes(self._nodes | {node})
+
+    def remove_node(self, node):
+        return self.set_nodes(self._nodes - {node})
+
+    def get_node(self, key):
+        """Return the node that owns a key"""
+        if not self._nodes:
+            raise LookupError("The hash ring has no nodes")
+        index = bisect.bisect_left(self._point_list, stable_hash(key))
+        return int(self._owners[index % len(self._owners)])
+
+    def get_nodes(self, hashes):
+        """Return the owning node for each of an array of precomputed stable hashes"""
+        if not self._nodes:
+            raise LookupError("The hash ring has no nodes")
+        indexes = np.searchsorted(self._points, np.asarray(hashes, dtype=np.uint64), side='left')
+        return self._owners[indexes % len(self._owners)]
+
+    def _owner_at(self, points, owners, positions):
+        return owners[np.searchsorted(points, positions, side='left') % len(owners)]
+
+    def _moved_fraction(self, old_points, old_owners):
+        """Exact share of the ring whose owner differs between the old and the new points"""
+        boundaries = np.union1d(old_points, self._points)
+        # The arc ending at each boundary, the first one wrapping around from the last boundary
+        lengths = np.diff(boundaries).astype(float)
+        lengths = np.concatenate(([float(boundaries[0]) + RING_SIZE - float(boundaries[-1])], lengths))
+        moved = (self._owner_at(old_points, old_owners, boundaries)
+                 != self._owner_at(self._points, self._owners, boundaries))
+        return float(lengths[moved].sum() / RING_SIZE)
@@ -0,0 +1,97 @@
+class IndexedHeap:
+    """Binary min-heap of keys ordered by (priority, key).
+
+    Keeps the position of every key, so the priority of any key can be changed or the
+    key removed in O(log n), while the smallest key is read in O(1).
+    """
+
+    def __init__(self):
+        self._heap = []  # [priority, key] pairs
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def push(self, key, priority=0):
+        """Add a new key"""
+        if key in self._positions:
+            raise KeyError(f"{key!r} is already in the heap")
+        self._heap.append([priority, key])
+        self._positions[key] = len(self._heap) - 1
+        self._sift_up(len(self._heap) - 1)
+
+    def remove(self, key):
+        """Remove a key and return its priority"""
+        position = self._positions.pop(key)
+        priority = self._heap[position][0]
+        last = self._heap.pop()
+        if position < len(self._heap):
+            self._heap[position] = last
+            self._positions[last[1]] = position
+            self._sift_down(self._sift_up(position))
+        return priority
+
+    def peek(self):
+        """Return the key with the smallest priority"""
+        if not self._heap:
+            raise IndexError("peek from an empty heap")
+        return self._heap[0][1]
+
+    def priority(self, key):
+        return self._heap[self._positions[key]][0]
+
+    def update(self, key, priority):
+        """Set the priority of an existing key"""
+        position = self._positions[key]
+        self._heap[position][0] = priority
+        self._sift_down(self._sift_up(position))
+
+    def increment(self, key, delta=1):
+        """Add delta to the priority of an existing key and return the new priority"""
+        position = self._positions[key]
+        entry = self._heap[position]
+        entry[0] += delta
+        if delta < 0:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+        return entry[0]
+
+    def _sift_up(self, position):
+        """Move the entry at position towards the root; return where it ends up"""
+        heap, positions = self._heap, self._positions
+        entry = heap[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            parent_entry = heap[parent]
+            if not entry < parent_entry:
+                break
+            heap[position] = parent_entry
+            positions[parent_entry[1]] = position
+            position = parent
+        heap[position] = entry
+        positions[entry[1]] = position
+        return position
+
+    def _sift_down(self, position):
+        """Move the entry at position towards the leaves; return where it ends up"""
+        heap, positions = self._heap, self._positions
+        size = len(heap)
+        entry = heap[position]
+        child = 2 * position + 1
+        while child < size:
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            child_entry = heap[child]
+            if not child_entry < entry:
+                break
+            heap[position] = child_entry
+            positions[child_entry[1]] = position
+            position = child
+            child = 2 * position + 1
+        heap[position] = entry
+        positions[entry[1]] = position
+        return position
@@ -1,89 +1,292 @@
+import logging
+import math
 import numpy as np
+import pandas as pd
 from collections import defaultdict
+from functools import partial
+from .telemetry import RingBuffer, SlidingWindow
+from .sketch import DDSketch
+from .indexed_heap import IndexedHeap
+from .hash_ring import HashRing, stable_hash, stable_hashes
+from .alias_table import AliasTable
+
+STRATEGIES = ('round_robin', 'least_connections', 'ip_hash', 'weighted_round_robin')
+HASH_MODES = ('consistent', 'modulo')
 
 class LoadBalancer:
-    def __init__(self, num_servers=3):
-        self.num_servers = num_servers
+    def __init__(self, num_servers=3, seed=None, retention=10000, hash_mode='consistent', vnodes=100,
+                 window_size=1000, window_seconds=None):
+        if hash_mode not in HASH_MODES:
+            raise ValueError(f"Unknown hash mode: {hash_mode}")
+        self._num_servers = 0
         self.current_server = 0
-        self.server_loads = defaultdict(list)
-        self.server_response_times = defaultdict(list)
-        self.connection_counts = defaultdict(int)  # For Least Connections
-        self.weights = [1] * num_servers  # Default weights for Weighted Round Robin
+        # Bounded per-server history: the last `retention` values plus running totals
+        self.server_loads = defaultdict(partial(RingBuffer, retention))
+        self.server_response_times = defaultdict(partial(RingBuffer, retention))
+        # Recent load per server (last window_size requests and/or window_seconds), for scaling decisions
+        self.load_windows = defaultdict(partial(SlidingWindow, window_size, window_seconds))
+        # Constant-memory latency distribution per server, for percentiles over all requests
+        self.response_time_sketches = defaultdict(DDSketch)
+        self._connections = IndexedHeap()  # Open connections per server, for Least Connections
+        # IP Hash: a consistent-hash ring keeps most clients on the same server across scale events
+        self.hash_mode = hash_mode
+        self.hash_ring = HashRing(vnodes=vnodes)
+        self.last_remap_fraction = 0.0  # Share of IP hash keys moved by the last resize
+        self._weights = [1] * num_servers  # Default weights for Weighted Round Robin
+        self._alias_table = None  # Built from the weights on first use
+
+        # Separate random streams for server selection, load and response time, so the
+        # per-request methods and dispatch_batch draw the same numbers under a fixed seed
+        streams = np.random.SeedSequence(seed).spawn(3)
+        self._select_rng, self._load_rng, self._latency_rng = [np.random.default_rng(s) for s in streams]
+
+        self.num_servers = num_servers
+
+    @property
+    def num_servers(self):
+        return self._num_servers
+
+    @num_servers.setter
+    def num_servers(self, num_servers):
+        """Add or remove servers, keeping the per-server selection state in step"""
+        if num_servers < 1:
+            raise ValueError("A load balancer needs at least one server")
+        for server in range(self._num_servers, num_servers):
+            self._connections.push(server, 0)
+        for server in range(num_servers, self._num_servers):
+            self._connections.remove(server)
+            self.load_windows.pop(server, None)
+        if len(self._weights) != num_servers:
+            # New servers join with the default weight, removed servers lose theirs
+            self._weights = (self._weights + [1] * num_servers)[:num_servers]
+            self._alias_table = None
+
+        moved = self.hash_ring.set_nodes(range(num_servers))
+        if self._num_servers and num_servers != self._num_servers:
+            if self.hash_mode == 'modulo':
+                # A key keeps its server only if its hash is below min(old, new) modulo lcm(old, new)
+                moved = 1 - min(num_servers, self._num_servers) / math.lcm(num_servers, self._num_servers)
+            self.last_remap_fraction = moved
+            logging.info(f"Resized from {self._num_servers} to {num_servers} servers, "
+                         f"{moved:.1%} of IP hash keys remapped")
+        self._num_servers = num_servers
+        self.current_server %= num_servers
+
+    @property
+    def weights(self):
+        """Per-server weights for Weighted Round Robin"""
+        return list(self._weights)
+
+    @weights.setter
+    def weights(self, weights):
+        if len(weights) != self.num_servers:
+            raise ValueError(f"Expected {self.num_servers} weights, got {len(weights)}")
+        self._weights = list(weights)
+        self._alias_table = None
 
-        # Initialize server loads
-        for server in range(num_servers):
-            self.server_loads[server] = []
-            self.server_response_times[server] = []
-            self.connection_counts[server] = 0
+    def _weighted_table(self):
+        """Alias table for the current weights, rebuilt only after they change"""
+        if self._alias_table is None:
+            self._alias_table = AliasTable(self._weights)
+        return self._alias_table
+
+    @property
+    def connection_counts(self):
+        """Open connections per server"""
+        return {server: self._connections.priority(server) for server in range(self.num_servers)}
+
+    def _simulate(self, request_load):
+        """Simulate the load and response time of a single request"""
+        load = self._load_rng.normal(request_load, request_load * 0.1)
+        response_time = load * self._latency_rng.uniform(0.8, 1.2)
+        return load, response_time
+
+    def record(self, server, load, response_time):
+        """Record a single request against a server"""
+        self.server_loads[server].append(load)
+        self.load_windows[server].append(load)
+        self.server_response_times[server].append(response_time)
+        self.response_time_sketches[server].add(response_time)
+
+    def record_batch(self, servers, loads, response_times):
+        """Record a batch of requests, grouped by server"""
+        servers = np.asarray(servers)
+        loads = np.asarray(loads, dtype=float)
+        response_times = np.asarray(response_times, dtype=float)
+        if not len(servers):
+            return
+        # Narrow the dtype first: NumPy's stable sort is a radix sort for small integers
+        order = np.argsort(servers.astype(np.min_scalar_type(servers.max())), kind='stable')
+        # Gather once in server order, so every server's values are a contiguous slice
+        loads, response_times = loads[order], response_times[order]
+        counts = np.bincount(servers)
+        ends = np.cumsum(counts)
+        for server in np.flatnonzero(counts).tolist():
+            chunk = slice(ends[server] - counts[server], ends[server])
+            self.server_loads[server].extend(loads[chunk])
+            self.load_windows[server].extend(loads[chunk])
+            self.server_response_times[server].extend(response_times[chunk])
+            self.response_time_sketches[server].add_many(response_times[chunk])
+
+    def _hash_servers(self, hashes):
+        """Map stable hashes of request IPs to servers"""
+        if self.hash_mode == 'consistent':
+            return self.hash_ring.get_nodes(hashes)
+        return (np.asarray(hashes, dtype=np.uint64) % np.uint64(self.num_servers)).astype(np.int64)
+
+    def select(self, strategy, request_ip=None):
+        """Choose a server for one request without simulating it.
+
+        With least_connections this opens a connection on the chosen server; call
+        release() when the request completes.
+        """
+        if strategy == 'round_robin':
+            selected_server = self.current_server
+            self.current_server = (self.current_server + 1) % self.num_servers
+        elif strategy == 'least_connections':
+            selected_server = self._connections.peek()
+            self._connections.increment(selected_server)
+        elif strategy == 'ip_hash':
+            if request_ip is None:
+                raise ValueError("ip_hash requires a request IP")
+            if self.hash_mode == 'consistent':
+                selected_server = self.hash_ring.get_node(request_ip)
+            else:
+                selected_server = stable_hash(request_ip) % self.num_servers
+        elif strategy == 'weighted_round_robin':
+            selected_server = self._weighted_table().draw(self._select_rng)
+        else:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        return selected_server
+
+    def release(self, server):
+        """Mark one connection to a server as finished"""
+        if server not in self._connections:
+            return  # The server was removed while the request was in flight
+        if self._connections.priority(server) <= 0:
+            raise ValueError(f"Server {server} has no open connections")
+        self._connections.increment(server, -1)
 
     def round_robin(self, request_load):
         """Implement round-robin load balancing"""
-        selected_server = self.current_server
-        
+        selected_server = self.select('round_robin')
+
         # Simulate server load
-        load = np.random.normal(request_load, request_load * 0.1)
-        response_time = load * np.random.uniform(0.8, 1.2)
-        
-        self.server_loads[selected_server].append(load)
-        self.server_response_times[selected_server].append(response_time)
-        
-        # Update current server
-        self.current_server = (self.current_server + 1) % self.num_servers
-        
+        load, response_time = self._simulate(request_load)
+        self.record(selected_server, load, response_time)
+
         return selected_server, load, response_time
 
     def least_connections(self, request_load):
         """Implement least connections load balancing"""
-        selected_server = min(self.connection_counts, key=self.connection_counts.get)
-        
+        selected_server = self.select('least_connections')
+
         # Simulate server load
-        load = np.random.normal(request_load, request_load * 0.1)
-        response_time = load * np.random.uniform(0.8, 1.2)
-        
-        self.server_loads[selected_server].append(load)
-        self.server_response_times[selected_server].append(response_time)
-        self.connection_counts[selected_server] += 1
-        
+        load, response_time = self._simulate(request_load)
+        self.record(selected_server, load, response_time)
+
         return selected_server, load, response_time
 
     def ip_hash(self, request_ip, request_load):
         """Implement IP hash load balancing"""
-        selected_server = hash(request_ip) % self.num_servers
-        
+        selected_server = self.select('ip_hash', request_ip)
+
         # Simulate server load
-        load = np.random.normal(request_load, request_load * 0.1)
-        response_time = load * np.random.uniform(0.8, 1.2)
-        
-        self.server_loads[selected_server].append(load)
-        self.server_response_times[selected_server].append(response_time)
-        
+        load, response_time = self._simulate(request_load)
+        self.record(selected_server, load, response_time)
+
         return selected_server, load, response_time
 
     def weighted_round_robin(self, request_load):
         """Implement weighted round-robin load balancing"""
-        server_weights = np.cumsum(self.weights)
-        total_weight = server_weights[-1]
-        random_weight = np.random.uniform(0, total_weight)
-        selected_server = np.searchsorted(server_weights, random_weight)
-        
+        selected_server = self.select('weighted_round_robin')
+
         # Simulate server load
-        load = np.random.normal(request_load, request_load * 0.1)
-        response_time = load * np.random.uniform(0.8, 1.2)
-        
-        self.server_loads[selected_server].append(load)
-        self.server_response_times[selected_server].append(response_time)
-        
+        load, response_time = self._simulate(request_load)
+        self.record(selected_server, load, response_time)
+
         return selected_server, load, response_time
 
+    def _least_connections_batch(self, n):
+        """Select servers for n requests exactly as n calls to least_connections would"""
+        counts = np.array([self._connections.priority(server) for server in range(self.num_servers)])
+
+        # Each pick takes the lowest (connection count, server) slot, so the picks are
+        # the first n slots in that order. Find the smallest level that covers n slots.
+        low = counts.min()
+        high = counts.max() + -(-n // len(counts))
+        while low < high:
+            level = (low + high) // 2
+            if np.maximum(level - counts, 0).sum() >= n:
+                high = level
+            else:
+                low = level + 1
+
+        slots = np.maximum(low - counts, 0)
+        servers = np.repeat(np.arange(len(counts)), slots)
+        levels = counts[servers] + np.arange(len(servers)) - np.repeat(np.cumsum(slots) - slots, slots)
+        picks = servers[np.lexsort((servers, levels))[:n]]
+
+        for server, added in enumerate(np.bincount(picks, minlength=len(counts)).tolist()):
+            if added:
+                self._connections.increment(server, added)
+        return picks
+
+    def select_batch(self, strategy, n, ips=None):
+        """Choose servers for n requests at once, as n calls to select() would"""
+        if strategy == 'round_robin':
+            servers = (self.current_server + np.arange(n)) % self.num_servers
+            self.current_server = (self.current_server + n) % self.num_servers
+        elif strategy == 'least_connections':
+            servers = self._least_connections_batch(n)
+        elif strategy == 'ip_hash':
+            if ips is None or len(ips) != n:
+                raise ValueError("ip_hash requires one IP per request")
+            # Hash each distinct IP once; traces repeat the same clients many times. Integer
+            # IPs (packed IPv4 or client ids) factorize much faster than strings.
+            if not (isinstance(ips, np.ndarray) and ips.dtype.kind in 'iu'):
+                ips = np.asarray(ips, dtype=object)
+            codes, unique_ips = pd.factorize(ips)
+            servers = self._hash_servers(stable_hashes(unique_ips.tolist()))[codes]
+        elif strategy == 'weighted_round_robin':
+            servers = self._weighted_table().draw_many(self._select_rng, n)
+        else:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        return servers
+
+    def dispatch_batch(self, strategy, loads, ips=None):
+        """Dispatch a batch of requests in one vectorized call.
+
+        Returns arrays of selected servers, simulated loads and response times, matching
+        the per-request method for the same strategy under the same seed.
+        """
+        loads = np.asarray(loads, dtype=float)
+        n = len(loads)
+        servers = self.select_batch(strategy, n, ips)
+
+        # Simulate server load
+        simulated_loads = self._load_rng.normal(loads, loads * 0.1)
+        response_times = simulated_loads * self._latency_rng.uniform(0.8, 1.2, size=n)
+        self.record_batch(servers, simulated_loads, response_times)
+
+        return servers, simulated_loads, response_times
+
     def get_server_metrics(self):
         """Calculate server performance metrics"""
         metrics = {}
-        
+
         for server in range(self.num_servers):
             metrics[f'server_{server}'] = {
-                'avg_load': np.mean(self.server_loads[server]) if self.server_loads[server] else 0,
-                'max_load': np.max(self.server_loads[server]) if self.server_loads[server] else 0,
-                'avg_response_time': np.mean(self.server_response_times[server]) if self.server_response_times[server] else 0
+                'avg_load': self.server_loads[server].running_mean(),
+                'max_load': self.server_loads[server].running_max(),
+                'avg_response_time': self.server_response_times[server].running_mean()
             }
-            
-        return metrics
\ No newline at end of file
+
+        return metrics
+
+    def get_latency_sketch(self):
+        """Merge the per-server latency sketches into one for the whole balancer"""
+        sketch = DDSketch()
+        for server_sketch in self.response_time_sketches.values():
+            sketch.merge(server_sketch)
+        return sketch
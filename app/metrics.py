@@ -1,4 +1,5 @@
 import numpy as np
+from .sketch import DDSketch
 
 class MetricsCalculator:
     @staticmethod
@@ -19,9 +20,32 @@ class MetricsCalculator:
     
     @staticmethod
     def calculate_performance_metrics(response_times):
-        """Calculate performance metrics"""
+        """Calculate performance metrics from raw response times or a DDSketch"""
+        if isinstance(response_times, DDSketch):
+            return MetricsCalculator.calculate_latency_percentiles(response_times)
         return {
             'avg_response_time': np.mean(response_times),
             'p95_response_time': np.percentile(response_times, 95),
             'p99_response_time': np.percentile(response_times, 99)
         }
+
+    @staticmethod
+    def calculate_latency_percentiles(sketch):
+        """Calculate latency percentiles from a sketch, each within its relative error"""
+        p50, p95, p99, p999 = sketch.quantiles([0.5, 0.95, 0.99, 0.999])
+        return {
+            'avg_response_time': sketch.mean(),
+            'p50_response_time': p50,
+            'p95_response_time': p95,
+            'p99_response_time': p99,
+            'p999_response_time': p999,
+            'relative_error': sketch.relative_accuracy
+        }
+
+    @staticmethod
+    def merge_sketches(sketches):
+        """Merge latency sketches, e.g. from several load balancers, into a fleet-wide view"""
+        merged = DDSketch()
+        for sketch in sketches:
+            merged.merge(sketch)
+        return merged
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+def fingerprint(data, params):
+    """Stable hash of a training frame together with the model parameters"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(map(str, data.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ModelCache:
+    """LRU cache of fitted models keyed by fingerprint, with an optional on-disk store.
+
+    Models evicted from memory stay on disk when `cache_dir` is set, and the disk
+    store can be shared by several processes: files are written atomically and
+    read back with `loads`.
+    """
+
+    def __init__(self, maxsize=16, cache_dir=None, dumps=None, loads=None):
+        if cache_dir is not None and (dumps is None or loads is None):
+            raise ValueError("An on-disk cache needs dumps and loads functions")
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.dumps = dumps
+        self.loads = loads
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached model for key, or None"""
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return self._models[key]
+
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            with open(self._path(key)) as f:
+                model = self.loads(f.read())
+            self._remember(key, model)
+            with self._lock:
+                self.hits += 1
+            return model
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, model):
+        """Cache a fitted model in memory and, if configured, on disk"""
+        self._remember(key, model)
+        if self.cache_dir is not None:
+            # Write to a temporary file first so readers never see a partial model
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(self.dumps(model))
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._models:
+                return True
+        return self.cache_dir is not None and os.path.exists(self._path(key))
+
+    def __len__(self):
+        return len(self._models)
+
+    def clear(self):
+        """Drop the in-memory models; the disk store is left as is"""
+        with self._lock:
+            self._models.clear()
@@ -1,32 +1,245 @@
+import atexit
+import logging
+import os
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
-def send_email(subject, body, to_email):
-    from_email = "harsh.mishra2022@glbajajgroup.org"  # Replace with your email address
-    from_password = "qstw etsv mzvr xaso"  # Replace with your app-specific password
+SUBJECT = "Notification from Application Load Analyzer"
 
+def smtp_settings():
+    """SMTP server and credentials from the environment"""
+    port = int(os.getenv('SMTP_PORT', '587'))
+    username = os.getenv('SMTP_USERNAME')
+    return {
+        'host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        'port': port,
+        'username': username,
+        'password': os.getenv('SMTP_PASSWORD'),
+        'from_email': os.getenv('SMTP_FROM', username),
+        'starttls': os.getenv('SMTP_STARTTLS', str(port == 587)).lower() in ('1', 'true', 'yes')
+    }
+
+def _message(subject, body, from_email, to_email):
     msg = MIMEMultipart()
     msg['From'] = from_email
     msg['To'] = to_email
     msg['Subject'] = subject
-
     msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def _body(message, details):
+    return f"Hello,\n\n{message}\n\nDetails:\n{details}\n\nBest regards,\nApplication Load Analyzer"
+
+class NotificationDispatcher:
+    """Sends email notifications from a background thread.
+
+    notify() only queues the message. The worker keeps one SMTP connection open
+    (closing it after idle_timeout), collects the messages arriving within
+    digest_window and sends each recipient a single digest of them, sends at most
+    `rate` emails per second with bursts of `burst`, drops a message whose text
+    and details repeat one queued in the last dedupe_window seconds, and retries
+    failed sends with exponential backoff.
+    """
+
+    def __init__(self, host='localhost', port=25, username=None, password=None, from_email=None, starttls=False,
+                 digest_window=5.0, max_batch=100, rate=1.0, burst=5, dedupe_window=300.0, max_retries=5,
+                 backoff=1.0, max_backoff=60.0, idle_timeout=60.0, timeout=30.0, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_email = from_email or username or 'noreply@localhost'
+        self.starttls = starttls
+        self.digest_window = digest_window
+        self.max_batch = max_batch
+        self.rate = rate
+        self.burst = burst
+        self.dedupe_window = dedupe_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.clock = clock  # Dedupe window and rate limit; inject both to test them deterministically
+        self.sleep = sleep
+        self._queue = queue.Queue()
+        self._recent = {}  # (recipient, subject, message, details) -> time last queued
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._refilled = clock()
+        self._smtp = None
+        self._worker = None
+        self.sent = 0
+        self.failed = 0
+        self.deduplicated = 0
+        self.connections = 0
+
+    def notify(self, message, recipient, details="", subject=SUBJECT):
+        """Queue a notification; return False if it duplicates a recent one"""
+        now = self.clock()
+        key = (recipient, subject, message, details)
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                self.deduplicated += 1
+                return False
+            self._recent[key] = now
+            if len(self._recent) > 10000:
+                self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='notifications', daemon=True)
+                self._worker.start()
+        self._queue.put((recipient, subject, message, details, datetime.now()))
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every queued notification has been sent or given up on; return whether it finished"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=30.0):
+        """Send what is queued, stop the worker and close the connection"""
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join(timeout)
+        self._disconnect()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self._disconnect()
+                continue
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = self._collect(batch)
+            try:
+                self._send_batch(batch)
+            except Exception as e:
+                logging.error(f"Error sending notifications: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _collect(self, batch):
+        """Add what arrives within the digest window to batch; return True if close() was called"""
+        deadline = time.monotonic() + self.digest_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _send_batch(self, batch):
+        by_recipient = {}
+        for recipient, subject, message, details, queued_at in batch:
+            by_recipient.setdefault(recipient, []).append((subject, message, details, queued_at))
+        for recipient, items in by_recipient.items():
+            if len(items) == 1:
+                subject, message, details, _ = items[0]
+                body = _body(message, details)
+            else:
+                subject = f"{len(items)} notifications from Application Load Analyzer"
+                body = _body(f"{len(items)} notifications were raised:", "\n\n".join(
+                    f"[{queued_at:%Y-%m-%d %H:%M:%S}] {message}\n{details}".rstrip()
+                    for _, message, details, queued_at in items))
+            self._send(recipient, subject, body)
+
+    def _take_token(self):
+        """Block until the rate limit allows another email"""
+        while True:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            self.sleep((1 - self._tokens) / self.rate)
+
+    def _connect(self):
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+            except BaseException:
+                smtp.close()
+                raise
+            self._smtp = smtp
+            self.connections += 1
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            self._smtp = None
+
+    def _send(self, recipient, subject, body):
+        text = _message(subject, body, self.from_email, recipient).as_string()
+        self._take_token()
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._connect().sendmail(self.from_email, recipient, text)
+                self.sent += 1
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                if isinstance(e, smtplib.SMTPRecipientsRefused) or getattr(e, 'smtp_code', 0) >= 500:
+                    # Permanent failure, e.g. bad credentials or recipient: retrying will not help
+                    logging.error(f"Notification to {recipient} rejected: {e}")
+                    break
+                self._disconnect()
+                if attempt == self.max_retries:
+                    logging.error(f"Notification to {recipient} failed after {attempt + 1} attempts: {e}")
+                    break
+                delay = min(self.backoff * 2 ** attempt, self.max_backoff)
+                logging.warning(f"Notification to {recipient} failed ({e}); retrying in {delay:.1f}s")
+                self.sleep(delay)
+        self.failed += 1
+        return False
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
 
-    try:
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(from_email, from_password)
-        text = msg.as_string()
-        server.sendmail(from_email, to_email, text)
-        server.quit()
-        print("Email sent successfully!")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+def get_dispatcher():
+    """The process-wide dispatcher, configured from the SMTP_* environment variables"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(**smtp_settings())
+            # Deliver what is still queued when the process exits
+            atexit.register(_dispatcher.close)
+        return _dispatcher
 
 def send_notification(method, message, recipient_email, details=""):
+    """Queue a notification without waiting for it to be sent"""
     if method == "Email":
-        subject = "Notification from Application Load Analyzer"
-        body = f"Hello,\n\n{message}\n\nDetails:\n{details}\n\nBest regards,\nApplication Load Analyzer"
-        send_email(subject, body, recipient_email)
\ No newline at end of file
+        return get_dispatcher().notify(message, recipient_email, details)
+    return False
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+from aiohttp import web
+
+from .load_balancer import LoadBalancer, STRATEGIES
+
+# Headers that describe a single connection and must not be forwarded (RFC 9110 section 7.6.1)
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+    'transfer-encoding', 'upgrade', 'host'
+}
+CHUNK_SIZE = 64 * 1024  # Bodies are relayed in chunks of this size, never held whole
+
+def _forward_headers(headers):
+    return {name: value for name, value in headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+
+class LoadBalancingProxy:
+    """Asyncio reverse proxy that spreads HTTP requests over a backend pool.
+
+    Backend i is server i of the LoadBalancer, so any of its strategies can route
+    real traffic. Upstream connections are pooled and kept alive, request and
+    response bodies are streamed through, every response time is recorded against
+    its server, and backends failing the periodic health check (or refusing a
+    connection) get no traffic until they pass again. `timeout` is how long a
+    backend may take to accept a connection or to send the next data.
+    """
+
+    def __init__(self, backends, strategy='round_robin', load_balancer=None, health_path='/health',
+                 health_interval=5.0, health_timeout=1.0, connection_limit=100, timeout=30.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        if not backends:
+            raise ValueError("The proxy needs at least one backend")
+        self.backends = [backend.rstrip('/') for backend in backends]
+        self.strategy = strategy
+        self.load_balancer = load_balancer or LoadBalancer(num_servers=len(self.backends))
+        self.load_balancer.num_servers = len(self.backends)
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.connection_limit = connection_limit
+        self.timeout = timeout
+        self.healthy = set(range(len(self.backends)))
+        self.in_flight = [0] * len(self.backends)
+        self._session = None
+        self._health_task = None
+
+    def _select(self, request_ip):
+        """Pick a healthy backend; also return whether the load balancer opened a connection on it"""
+        server = self.load_balancer.select(self.strategy, request_ip)
+        if server in self.healthy:
+            return server, True
+        if self.strategy == 'least_connections':
+            self.load_balancer.release(server)
+        elif self.strategy != 'ip_hash':
+            # Rotating strategies reach a healthy backend within one pass
+            for _ in range(len(self.backends) - 1):
+                server = self.load_balancer.select(self.strategy, request_ip)
+                if server in self.healthy:
+                    return server, True
+        if not self.healthy:
+            return None, False
+        # Fall back to the least busy healthy backend
+        return min(self.healthy, key=lambda healthy: (self.in_flight[healthy], healthy)), False
+
+    @staticmethod
+    def _client_key(request):
+        """Client address for ip_hash; request.remote is None e.g. over unix sockets"""
+        if request.remote:
+            return request.remote
+        forwarded = request.headers.get('X-Forwarded-For', '')
+        return forwarded.split(',')[0].strip() or 'unknown'
+
+    async def handle(self, request):
+        """Forward one request to a backend and stream its response back"""
+        server, opened = self._select(self._client_key(request))
+        if server is None:
+            return web.Response(status=503, text="No healthy backends")
+
+        self.in_flight[server] += 1
+        url = self.backends[server] + str(request.rel_url)
+        start = time.perf_counter()
+        response = None
+        try:
+            async with self._session.request(request.method, url, headers=_forward_headers(request.headers),
+                                             data=request.content if request.body_exists else None,
+                                             allow_redirects=False) as upstream:
+                response = web.StreamResponse(status=upstream.status, headers=_forward_headers(upstream.headers))
+                await response.prepare(request)
+                async for chunk in upstream.content.iter_chunked(CHUNK_SIZE):
+                    await response.write(chunk)
+                await response.write_eof()
+        except asyncio.TimeoutError as e:
+            logging.error(f"Backend {self.backends[server]} timed out: {e!r}")
+            if response is not None:
+                raise  # The status line is already sent; dropping the connection is all that is left
+            return web.Response(status=504, text="Gateway timeout")
+        except aiohttp.ClientError as e:
+            logging.error(f"Backend {self.backends[server]} failed: {e!r}")
+            if isinstance(e, aiohttp.ClientConnectorError):
+                self.healthy.discard(server)
+            if response is not None:
+                raise
+            return web.Response(status=502, text="Bad gateway")
+        finally:
+            self.in_flight[server] -= 1
+            if opened and self.strategy == 'least_connections':
+                self.load_balancer.release(server)
+
+        response_time = (time.perf_counter() - start) * 1000
+        # The load of a request is how many requests its backend was serving, including it
+        self.load_balancer.record(server, self.in_flight[server] + 1, response_time)
+        return response
+
+    async def check_health(self):
+        """Probe every backend once and update the healthy set"""
+        async def probe(server):
+            try:
+                async with self._session.get(self.backends[server] + self.health_path,
+                                             timeout=aiohttp.ClientTimeout(total=self.health_timeout)) as response:
+                    return response.status < 500
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+
+        results = await asyncio.gather(*(probe(server) for server in range(len(self.backends))))
+        for server, healthy in enumerate(results):
+            if healthy and server not in self.healthy:
+                logging.info(f"Backend {self.backends[server]} is healthy again")
+                self.healthy.add(server)
+            elif not healthy and server in self.healthy:
+                logging.warning(f"Backend {self.backends[server]} failed its health check")
+                self.healthy.discard(server)
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    async def _start(self, app):
+        connector = aiohttp.TCPConnector(limit=self.connection_limit, keepalive_timeout=60)
+        # No total timeout, so large bodies can take as long as they keep flowing
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+        self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False)
+        if self.health_interval:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _stop(self, app):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        await self._session.close()
+
+    def make_app(self):
+        """aiohttp application that proxies every path"""
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.handle)
+        app.on_startup.append(self._start)
+        app.on_cleanup.append(self._stop)
+        return app
+
+def run_proxy(backends, host='localhost', port=8080, strategy='round_robin', **options):
+    """Run a load-balancing reverse proxy until interrupted"""
+    proxy = LoadBalancingProxy(backends, strategy, **options)
+    web.run_app(proxy.make_app(), host=host, port=port)
@@ -4,23 +4,170 @@ import json
 import logging
 import socket
 
+import numpy as np
+
+from .anomaly import StreamingAnomalyDetector
+
+try:
+    import msgpack
+except ImportError:  # Fall back to JSON text frames
+    msgpack = None
+
+def encode(message, encoding='msgpack'):
+    """Encode a message as a msgpack binary frame, or JSON text when msgpack is unavailable"""
+    if encoding == 'msgpack' and msgpack is not None:
+        return msgpack.packb(message)
+    return json.dumps(message, separators=(',', ':'))
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+def diff_metrics(previous, current):
+    """Fields of current that differ from previous, per server, and the servers that went away"""
+    changed = {}
+    for server, metrics in current.items():
+        old = previous.get(server, {})
+        fields = {field: value for field, value in metrics.items() if old.get(field) != value}
+        if fields:
+            changed[server] = fields
+    removed = [server for server in previous if server not in current]
+    return changed, removed
+
 class RealTimeMonitor:
-    def __init__(self, load_balancer):
+    """Pushes server metrics to any number of WebSocket clients.
+
+    One producer computes the metrics once per tick and broadcasts only the fields
+    that changed; nothing is sent on ticks where nothing changed. Each client has
+    a bounded queue: a client that falls behind has its backlog replaced by a
+    single full snapshot, so slow dashboards never hold up the others.
+    """
+
+    def __init__(self, load_balancer, detector_params=None, tick=1.0, encoding='msgpack', queue_size=8):
         self.load_balancer = load_balancer
+        self.detector_params = detector_params or {}
+        self.detectors = {}  # server -> StreamingAnomalyDetector over its response times
+        self._seen = {}  # server -> number of response times already scored
+        self.tick = tick
+        self.encoding = encoding if msgpack is not None else 'json'
+        self.queue_size = queue_size
+        self._clients = set()  # One asyncio.Queue of encoded frames per client
+        self._snapshot = {}
+        self._seq = 0
+        self._producer = None
+        self.resyncs = 0
+
+    def detect_anomalies(self):
+        """Score the response times recorded since the last call, per server.
+
+        Returns {server: (is_anomalous, anomalies in the new values)}. Each new value
+        is scored once, so an anomaly is flagged on the first tick after it is recorded.
+        """
+        results = {}
+        for server in range(self.load_balancer.num_servers):
+            response_times = self.load_balancer.server_response_times[server]
+            if server not in self.detectors:
+                self.detectors[server] = StreamingAnomalyDetector(**self.detector_params)
+                self._seen[server] = 0
+            new_count = response_times.count - self._seen[server]
+            self._seen[server] = response_times.count
+            # Values that rolled out of the buffer between ticks can no longer be scored
+            new_values = response_times.tail(new_count)
+            flags = self.detectors[server].update_many(new_values)
+            results[server] = (bool(flags.any()), int(flags.sum()))
+        return results
+
+    def get_metrics(self):
+        """Server metrics with this tick's anomaly flags added"""
+        server_metrics = self.load_balancer.get_server_metrics()
+        for server, (is_anomalous, count) in self.detect_anomalies().items():
+            server_metrics[f'server_{server}']['anomaly'] = is_anomalous
+            server_metrics[f'server_{server}']['anomaly_count'] = count
+        return {server: {field: _plain(value) for field, value in metrics.items()}
+                for server, metrics in server_metrics.items()}
+
+    def _full_frame(self):
+        return encode({'seq': self._seq, 'full': self._snapshot}, self.encoding)
+
+    def publish(self):
+        """Compute the metrics once and queue the changes for every client; return whether anything changed"""
+        current = self.get_metrics()
+        changed, removed = diff_metrics(self._snapshot, current)
+        self._snapshot = current
+        if not changed and not removed:
+            return False
+        self._seq += 1
+        message = {'seq': self._seq, 'delta': changed}
+        if removed:
+            message['removed'] = removed
+        frame = encode(message, self.encoding)
+
+        full_frame = None
+        for queue in self._clients:
+            if queue.full():
+                # The client fell behind: drop its backlog and resync it with one snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                full_frame = full_frame or self._full_frame()
+                queue.put_nowait(full_frame)
+                self.resyncs += 1
+            else:
+                queue.put_nowait(frame)
+        return True
+
+    async def _produce(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._clients:
+                started = loop.time()
+                try:
+                    self.publish()
+                except Exception as e:
+                    logging.error(f"Error publishing metrics: {e}")
+                await asyncio.sleep(max(self.tick - (loop.time() - started), 0))
+        finally:
+            if self._producer is asyncio.current_task():
+                self._producer = None
+
+    def _remove_client(self, queue):
+        self._clients.discard(queue)
+        if not self._clients and self._producer is not None:
+            # Nobody is listening: stop ticking until the next client connects
+            self._producer.cancel()
+            self._producer = None
 
-    async def monitor_load(self, websocket, path):
+    async def monitor_load(self, websocket, path=None):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        if self._producer is None:
+            # Nothing kept the snapshot current while no client was connected
+            self._snapshot = self.get_metrics()
+        queue.put_nowait(self._full_frame())
+        self._clients.add(queue)
+        if self._producer is None:
+            self._producer = asyncio.create_task(self._produce())
+        closed = asyncio.ensure_future(websocket.wait_closed())
+        frame = None
         try:
             while True:
-                server_metrics = self.load_balancer.get_server_metrics()
-                await websocket.send(json.dumps(server_metrics))
-                await asyncio.sleep(1)
+                # Wake up on the next frame or on disconnect, whichever comes first
+                frame = asyncio.ensure_future(queue.get())
+                await asyncio.wait({frame, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if not frame.done():
+                    break
+                await websocket.send(frame.result())
         except websockets.exceptions.ConnectionClosedError as e:
             logging.error(f"WebSocket connection closed with exception: {e}")
+        except websockets.exceptions.ConnectionClosedOK:
+            pass
         except Exception as e:
             logging.error(f"Unexpected error in monitor_load: {e}")
+        finally:
+            closed.cancel()
+            if frame is not None:
+                frame.cancel()
+            self._remove_client(queue)
 
-async def start_real_time_monitor(load_balancer, port=6790):
-    monitor = RealTimeMonitor(load_balancer)
+async def start_real_time_monitor(load_balancer, port=6790, tick=1.0):
+    monitor = RealTimeMonitor(load_balancer, tick=tick)
     start_server = websockets.serve(monitor.monitor_load, "localhost", port)
     await start_server
 
@@ -28,4 +175,4 @@ def find_free_port():
     """Find a free port to use for the WebSocket server."""
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.bind(('', 0))
-        return s.getsockname()[1]
\ No newline at end of file
+        return s.getsockname()[1]
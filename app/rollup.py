@@ -0,0 +1,104 @@
+import pandas as pd
+
+DEFAULT_RESOLUTIONS = ('1min', '5min', '1h', '1D')
+STATS = ('mean', 'max', 'p95', 'count')
+
+class RollupStore:
+    """Per-bucket mean, max, p95 and count of metrics at several resolutions.
+
+    Rows are added in time order. Finished buckets are aggregated once and kept;
+    only the raw rows of each resolution's latest, still open bucket are held, so
+    an add costs time proportional to the new rows plus one open bucket.
+    """
+
+    def __init__(self, columns, resolutions=DEFAULT_RESOLUTIONS, timestamp_col='timestamp'):
+        self.columns = list(columns)
+        self.resolutions = sorted(pd.Timedelta(resolution) for resolution in resolutions)
+        self.timestamp_col = timestamp_col
+        self._closed = {resolution: [] for resolution in self.resolutions}  # Aggregated frames, oldest first
+        self._open = {resolution: None for resolution in self.resolutions}  # Raw rows of the open bucket
+
+    def add(self, frame):
+        """Add rows that are no older than the rows added before"""
+        rows = frame[[self.timestamp_col, *self.columns]]
+        if not len(rows):
+            return
+        for resolution in self.resolutions:
+            open_rows = self._open[resolution]
+            if open_rows is not None:
+                if rows[self.timestamp_col].min() < open_rows[self.timestamp_col].iloc[0].floor(resolution):
+                    raise ValueError("Rows must be added in time order")
+                combined = pd.concat([open_rows, rows], ignore_index=True)
+            else:
+                combined = rows
+            buckets = combined[self.timestamp_col].dt.floor(resolution)
+            closed = (buckets < buckets.max()).to_numpy()
+            if closed.any():
+                self._closed[resolution].append(self._aggregate(combined[closed], buckets[closed]))
+            self._open[resolution] = combined[~closed]
+
+    def _aggregate(self, rows, buckets):
+        grouped = rows[self.columns].groupby(buckets)
+        stats = {'mean': grouped.mean(), 'max': grouped.max(), 'p95': grouped.quantile(0.95), 'count': grouped.count()}
+        aggregated = pd.concat({stat: stats[stat] for stat in STATS}, axis=1)
+        aggregated.columns = [f'{column}_{stat}' for stat, column in aggregated.columns]
+        aggregated.index.name = self.timestamp_col
+        return aggregated[[f'{column}_{stat}' for column in self.columns for stat in STATS]]
+
+    def get(self, resolution, start=None, end=None):
+        """Aggregates at resolution for buckets starting in [start, end), including the open bucket"""
+        resolution = pd.Timedelta(resolution)
+        if resolution not in self._closed:
+            raise ValueError(f"No rollup at resolution {resolution}")
+        closed = self._closed[resolution]
+        if len(closed) > 1:
+            closed[:] = [pd.concat(closed)]
+        frames = list(closed)
+        open_rows = self._open[resolution]
+        if open_rows is not None and len(open_rows):
+            frames.append(self._aggregate(open_rows, open_rows[self.timestamp_col].dt.floor(resolution)))
+        if not frames:
+            return pd.DataFrame(columns=[f'{column}_{stat}' for column in self.columns for stat in STATS])
+        rollup = pd.concat(frames) if len(frames) > 1 else frames[0]
+        if start is not None:
+            rollup = rollup[rollup.index >= pd.Timestamp(start)]
+        if end is not None:
+            rollup = rollup[rollup.index < pd.Timestamp(end)]
+        return rollup
+
+    def resolution_for(self, freq=None, max_points=None, start=None, end=None):
+        """Pick the coarsest stored resolution that answers a query.
+
+        With freq, that is the coarsest resolution no coarser than freq. With
+        max_points, it is the finest resolution (among those) that covers
+        [start, end) in at most max_points buckets, or the coarsest one if none does.
+        """
+        candidates = self.resolutions
+        if freq is not None:
+            candidates = [resolution for resolution in candidates if resolution <= pd.Timedelta(freq)]
+            if not candidates:
+                raise ValueError(f"No rollup at or below {freq}")
+            candidates = candidates[-1:] if max_points is None else candidates
+        if max_points is None:
+            return candidates[-1]
+
+        first, last = self._span()
+        if first is None:
+            return candidates[-1]
+        first = max(first, pd.Timestamp(start)) if start is not None else first
+        last = min(last, pd.Timestamp(end)) if end is not None else last
+        for resolution in candidates:
+            if (last - first) / resolution + 1 <= max_points:
+                return resolution
+        return candidates[-1]
+
+    def _span(self):
+        """First and last timestamps added so far"""
+        finest = self.resolutions[0]
+        open_rows = self._open[finest]
+        if open_rows is None:
+            return None, None
+        last = open_rows[self.timestamp_col].iloc[-1]
+        closed = self._closed[finest]
+        first = closed[0].index[0] if closed else open_rows[self.timestamp_col].iloc[0]
+        return first, last
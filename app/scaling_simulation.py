@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from .auto_scaler import AutoScaler
+from .forecaster import Forecaster
+from .load_balancer import LoadBalancer
+
+def simulate_autoscaling(data, mode, start, capacity_per_server=100, slo_utilization=0.9, initial_servers=10,
+                         requests_per_server=10, retrain_every=24, backend='fourier_ridge', freq='h', seed=0,
+                         **scaler_params):
+    """Replay a demand series through an AutoScaler and measure SLO violations and server-hours.
+
+    data is a 'ds'/'y' frame of demand (e.g. active users) at freq; the first rows
+    up to start are history only. At every later period the demand is served by
+    the servers decided at the previous period, a period whose per-server
+    utilization (demand / (servers * capacity_per_server)) exceeds slo_utilization
+    is an SLO violation, and then the scaler decides the count for the next period.
+    The reactive scaler sees the observed utilization through the load balancer;
+    the predictive one sees a forecast refitted every retrain_every periods.
+    Returns per-period rows and a summary.
+    """
+    data = data.sort_values('ds', ignore_index=True)
+    period = pd.Timedelta(pd.tseries.frequencies.to_offset(freq))
+    # Reactive load windows cover the last period
+    load_balancer = LoadBalancer(num_servers=initial_servers, seed=seed, window_size=requests_per_server)
+    clock = [0.0]
+    scaler_params.setdefault('scale_up_threshold', 80)
+    scaler_params.setdefault('scale_down_threshold', 20)
+    forecaster = Forecaster(backend=backend, freq=freq) if mode == 'predictive' else None
+    scaler = AutoScaler(load_balancer, mode=mode, forecaster=forecaster, capacity_per_server=capacity_per_server,
+                        clock=lambda: clock[0], **scaler_params)
+
+    rows = []
+    first = int(np.searchsorted(data['ds'].to_numpy(), np.datetime64(pd.Timestamp(start))))
+    for position in range(first, len(data)):
+        timestamp, demand = data['ds'].iloc[position], float(data['y'].iloc[position])
+        servers = load_balancer.num_servers
+        utilization = demand / (servers * capacity_per_server)
+        rows.append({'ds': timestamp, 'demand': demand, 'servers': servers, 'utilization': utilization,
+                     'slo_violation': utilization > slo_utilization})
+
+        clock[0] = (timestamp - data['ds'].iloc[0]) / pd.Timedelta(seconds=1)
+        if mode == 'predictive':
+            if (position - first) % retrain_every == 0:
+                forecaster.train(data.iloc[:position + 1])
+                forecaster.predict(periods=retrain_every + scaler.horizon)
+            scaler.check_and_scale(now=timestamp)
+        else:
+            # Every server reports the period's utilization as its load, in percent
+            loads = np.full(servers * requests_per_server, utilization * 100)
+            load_balancer.dispatch_batch('round_robin', loads)
+            scaler.check_and_scale()
+
+    periods = pd.DataFrame(rows)
+    summary = {
+        'mode': mode,
+        'periods': len(periods),
+        'slo_violations': int(periods['slo_violation'].sum()),
+        'server_hours': float(periods['servers'].sum() * period / pd.Timedelta(hours=1)),
+        'mean_utilization': float(periods['utilization'].mean()),
+        'scaling_actions': int((periods['servers'].diff().fillna(0) != 0).sum())
+    }
+    return periods, summary
@@ -0,0 +1,160 @@
+import heapq
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .load_balancer import STRATEGIES
+
+class PoissonArrivals:
+    """Requests arriving as a Poisson process with exponentially distributed work"""
+
+    def __init__(self, rate, mean_load=50, num_clients=1000, seed=None):
+        self.rate = rate  # Requests per second
+        self.mean_load = mean_load  # Work units per request
+        self.num_clients = num_clients
+        self.rng = np.random.default_rng(seed)
+
+    def generate(self, num_requests):
+        """Return arrival times (seconds), request loads and client IPs"""
+        times = np.cumsum(self.rng.exponential(1 / self.rate, num_requests))
+        loads = self.rng.exponential(self.mean_load, num_requests)
+        ips = self.rng.integers(0, self.num_clients, num_requests)
+        return times, loads, ips
+
+class TraceArrivals:
+    """Replay of recorded requests; timestamps may be seconds or datetimes"""
+
+    def __init__(self, timestamps, loads, ips=None):
+        timestamps = np.asarray(timestamps)
+        if not np.issubdtype(timestamps.dtype, np.number):
+            timestamps = pd.to_datetime(timestamps).to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+        self.timestamps = timestamps.astype(float)
+        self.loads = np.asarray(loads, dtype=float)
+        self.ips = np.zeros(len(self.loads), dtype=np.int64) if ips is None else np.asarray(ips)
+
+    def generate(self, num_requests=None):
+        order = np.argsort(self.timestamps, kind='stable')[:num_requests]
+        times = self.timestamps[order] - self.timestamps[order[0]]
+        return times, self.loads[order], self.ips[order]
+
+class Simulator:
+    """Discrete-event simulation of a LoadBalancer in front of queueing servers.
+
+    Each server has `capacity` parallel slots that work through requests at
+    `service_rate` load units per second, with a FIFO queue in front of them. A
+    request's response time is the time it waited in the queue plus its service
+    time. Departures go through a heap of completion events, which is what lets
+    least_connections see connections close as requests finish.
+    """
+
+    def __init__(self, load_balancer, strategy='round_robin', capacity=1, service_rate=100.0, queue_limit=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.load_balancer = load_balancer
+        self.strategy = strategy
+        num_servers = load_balancer.num_servers
+        self.capacity = np.broadcast_to(capacity, num_servers).astype(int)
+        self.service_rate = np.broadcast_to(service_rate, num_servers).astype(float)
+        self.queue_limit = queue_limit  # Requests waiting per server before new ones are dropped
+
+    def run(self, arrivals, num_requests):
+        """Simulate num_requests from an arrival process and record them on the load balancer.
+
+        Returns a dict of per-request arrays: server, arrival, start, departure, wait,
+        response_time and dropped.
+        """
+        times, loads, ips = arrivals.generate(num_requests)
+        n = len(times)
+        load_balancer = self.load_balancer
+        tracks_connections = self.strategy == 'least_connections'
+
+        # Only least_connections depends on server state; the rest can be chosen up front
+        servers = np.zeros(n, dtype=np.int64) if tracks_connections else load_balancer.select_batch(self.strategy, n, ips)
+        service_times = loads / self.service_rate[servers] if not tracks_connections else None
+        starts = [0.0] * n
+        departures = [0.0] * n
+        dropped = [False] * n
+
+        free_slots = [[0.0] * capacity for capacity in self.capacity.tolist()]  # Per-server heaps of slot free times
+        waiting = [deque() for _ in range(len(free_slots))]  # Start times of queued requests
+        completions = []  # (departure time, server) events
+        queue_limit = self.queue_limit
+        service_rate = self.service_rate.tolist()
+        heappush, heappop, heapreplace = heapq.heappush, heapq.heappop, heapq.heapreplace
+        select, release = load_balancer.select, load_balancer.release
+
+        times_list = times.tolist()
+        loads_list = loads.tolist()
+        servers_list = servers.tolist()
+        service_list = service_times.tolist() if service_times is not None else None
+        for i, t in enumerate(times_list):
+            if tracks_connections:
+                while completions and completions[0][0] <= t:
+                    release(heappop(completions)[1])
+                server = select('least_connections')
+                servers_list[i] = server
+                service_time = loads_list[i] / service_rate[server]
+            else:
+                server = servers_list[i]
+                service_time = service_list[i]
+
+            if queue_limit is not None:
+                queue = waiting[server]
+                while queue and queue[0] <= t:
+                    queue.popleft()
+                if len(queue) >= queue_limit:
+                    dropped[i] = True
+                    starts[i] = departures[i] = t
+                    if tracks_connections:
+                        release(server)
+                    continue
+
+            slots = free_slots[server]
+            start = slots[0] if slots[0] > t else t
+            end = start + service_time
+            heapreplace(slots, end)
+            starts[i] = start
+            departures[i] = end
+            if queue_limit is not None and start > t:
+                queue.append(start)
+            if tracks_connections:
+                heappush(completions, (end, server))
+
+        # Requests still in flight at the end of the run complete as scheduled
+        for _, server in completions:
+            release(server)
+
+        servers = np.array(servers_list, dtype=np.int64)
+        starts = np.array(starts)
+        departures = np.array(departures)
+        dropped = np.array(dropped)
+        response_times = departures - times
+        served = ~dropped
+        load_balancer.record_batch(servers[served], loads[served], response_times[served])
+
+        return {
+            'server': servers,
+            'arrival': times,
+            'start': starts,
+            'departure': departures,
+            'wait': starts - times,
+            'response_time': response_times,
+            'dropped': dropped
+        }
+
+    @staticmethod
+    def summarize(results):
+        """Summarize a run: throughput, drop rate and queueing latency percentiles"""
+        served = ~results['dropped']
+        response_times = results['response_time'][served]
+        duration = results['departure'][served].max() - results['arrival'].min() if served.any() else 0
+        return {
+            'requests': len(served),
+            'dropped': int((~served).sum()),
+            'throughput': served.sum() / duration if duration else 0,
+            'avg_wait': results['wait'][served].mean() if served.any() else 0,
+            'avg_response_time': response_times.mean() if served.any() else 0,
+            'p95_response_time': np.percentile(response_times, 95) if served.any() else 0,
+            'p99_response_time': np.percentile(response_times, 99) if served.any() else 0
+        }
@@ -0,0 +1,202 @@
+import math
+import numpy as np
+
+class DDSketch:
+    """Mergeable quantile sketch with a relative-error guarantee (DDSketch).
+
+    Values are counted in logarithmic bins, so any quantile of positive values is
+    returned within `relative_accuracy` of the true value (1% by default). Memory
+    is bounded by `max_bins`; past that the lowest bins are collapsed together,
+    which only affects the accuracy of the very lowest quantiles.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048, min_value=1e-9):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.min_value = min_value  # Values at or below this are counted as zero
+        self._bins = np.zeros(0)
+        self._offset = 0  # Key of the first bin
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _extend_range(self, low, high):
+        """Make sure bins exist for keys low..high, collapsing the lowest bins if needed"""
+        if not len(self._bins):
+            low = max(low, high - self.max_bins + 1)
+            self._bins = np.zeros(high - low + 1)
+            self._offset = low
+            return
+        current_high = self._offset + len(self._bins) - 1
+        low = min(low, self._offset)
+        high = max(high, current_high)
+        low = max(low, high - self.max_bins + 1)
+        if low == self._offset and high == current_high:
+            return
+
+        bins = np.zeros(high - low + 1)
+        if low > self._offset:
+            # Fold the bins that fall below the new range into its first bin
+            cut = low - self._offset
+            bins[0] = self._bins[:cut].sum()
+            kept = self._bins[cut:]
+            bins[:len(kept)] += kept
+        else:
+            start = self._offset - low
+            bins[start:start + len(self._bins)] = self._bins
+        self._bins = bins
+        self._offset = low
+
+    def add(self, value):
+        """Add a single value"""
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= self.min_value:
+            self.zero_count += 1
+            return
+        key = self._key(value)
+        index = key - self._offset
+        if not 0 <= index < len(self._bins):
+            self._extend_range(key, key)
+            index = max(key - self._offset, 0)
+        self._bins[index] += 1
+
+    def add_many(self, values):
+        """Add an array of values in one vectorized update"""
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        self.count += len(values)
+        self.sum += values.sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        positive = values[values > self.min_value]
+        self.zero_count += len(values) - len(positive)
+        if not len(positive):
+            return
+        keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        self._extend_range(int(keys.min()), int(keys.max()))
+        indexes = np.maximum(keys - self._offset, 0)
+        self._bins[:indexes.max() + 1] += np.bincount(indexes)
+
+    def remove_many(self, values):
+        """Remove values that were added before, e.g. when they leave a sliding window.
+
+        min and max keep covering every value ever added, so they only loosen.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        self.count -= len(values)
+        self.sum -= values.sum()
+
+        positive = values[values > self.min_value]
+        self.zero_count -= len(values) - len(positive)
+        if not len(positive):
+            return
+        keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        # Same key to bin mapping as add_many, including values folded into the first bin
+        indexes = np.clip(keys - self._offset, 0, len(self._bins) - 1)
+        self._bins[:indexes.max() + 1] -= np.bincount(indexes)
+
+    def merge(self, other):
+        """Fold another sketch with the same accuracy into this one"""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("Can only merge sketches with the same relative accuracy")
+        self.count += other.count
+        self.sum += other.sum
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(other._bins):
+            other_high = other._offset + len(other._bins) - 1
+            self._extend_range(other._offset, other_high)
+            indexes = np.maximum(np.arange(other._offset, other_high + 1) - self._offset, 0)
+            np.add.at(self._bins, indexes, other._bins)
+        return self
+
+    def copy(self):
+        """Return an independent copy of the sketch"""
+        sketch = DDSketch(self.relative_accuracy, self.max_bins, self.min_value)
+        return sketch.merge(self)
+
+    def quantiles(self, qs):
+        """Return the values at the given quantiles (between 0 and 1)"""
+        qs = np.asarray(qs, dtype=float)
+        if not self.count:
+            return np.zeros_like(qs)
+        ranks = qs * (self.count - 1)
+        cumulative = self.zero_count + np.cumsum(self._bins)
+        indexes = np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(self._bins) - 1)
+        values = np.where(ranks < self.zero_count, 0.0, self._value(self._offset + indexes))
+        return np.clip(values, self.min, self.max)
+
+    def quantile(self, q):
+        """Return the value at quantile q (between 0 and 1)"""
+        return float(self.quantiles([q])[0])
+
+    def mean(self):
+        """Exact mean of the values added"""
+        return self.sum / self.count if self.count else 0.0
+
+    def __len__(self):
+        return self.count
+
+class SignedDDSketch:
+    """DDSketch for values of any sign.
+
+    DDSketch counts values at or below min_value as zero, so negative values go to
+    a second sketch of their magnitudes. Quantiles are within relative_accuracy of
+    the true value's magnitude on either side of zero.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_bins=2048):
+        self.positive = DDSketch(relative_accuracy, max_bins)
+        self.negative = DDSketch(relative_accuracy, max_bins)  # Magnitudes of the negative values
+
+    @property
+    def count(self):
+        return self.positive.count + self.negative.count
+
+    def add_many(self, values):
+        """Add an array of values in one vectorized update"""
+        values = np.asarray(values, dtype=float).ravel()
+        negative = values < 0
+        self.positive.add_many(values[~negative])
+        self.negative.add_many(-values[negative])
+
+    def quantiles(self, qs):
+        """Return the values at the given quantiles (between 0 and 1)"""
+        ranks = np.asarray(qs, dtype=float) * max(self.count - 1, 0)
+        below = ranks < self.negative.count  # Every negative value sorts before the rest
+        values = np.zeros(len(ranks))
+        if below.any():
+            # The k-th smallest negative value has the (n - 1 - k)-th smallest magnitude
+            spread = max(self.negative.count - 1, 1)
+            values[below] = -self.negative.quantiles(np.clip((self.negative.count - 1 - ranks[below]) / spread, 0, 1))
+        if (~below).any() and self.positive.count:
+            spread = max(self.positive.count - 1, 1)
+            values[~below] = self.positive.quantiles(np.clip((ranks[~below] - self.negative.count) / spread, 0, 1))
+        return values
+
+    def quantile(self, q):
+        """Return the value at quantile q (between 0 and 1)"""
+        return float(self.quantiles([q])[0])
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,57 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .load_balancer import LoadBalancer, STRATEGIES
+from .metrics import MetricsCalculator
+
+def run_simulation(strategy, num_servers, request_load, seed, num_requests=10000, num_clients=1000):
+    """Run one load balancing simulation and return one row per server.
+
+    Every row carries the run's configuration, the server's get_server_metrics()
+    values and the run's load distribution (prefixed with `dist_`). The same
+    configuration and seed always give the same rows.
+    """
+    load_balancer = LoadBalancer(num_servers=num_servers, seed=seed)
+    loads = np.full(num_requests, request_load, dtype=float)
+    ips = np.random.default_rng(seed).integers(0, num_clients, num_requests) if strategy == 'ip_hash' else None
+    load_balancer.dispatch_batch(strategy, loads, ips)
+
+    server_metrics = load_balancer.get_server_metrics()
+    distribution = MetricsCalculator.calculate_load_distribution(server_metrics)
+    config = {'strategy': strategy, 'num_servers': num_servers, 'request_load': request_load, 'seed': seed}
+    return [
+        {**config, 'server': server, **metrics, **{f'dist_{key}': value for key, value in distribution.items()}}
+        for server, metrics in server_metrics.items()
+    ]
+
+def _run_config(args):
+    config, num_requests = args
+    return run_simulation(*config, num_requests=num_requests)
+
+def run_sweep(strategies=STRATEGIES, num_servers=(3,), request_loads=(50,), seeds=(0,),
+              num_requests=10000, max_workers=None):
+    """Run every strategy x num_servers x request_load x seed combination in parallel.
+
+    Runs are spread over a process pool (one process per core by default) and the
+    results come back as one tidy DataFrame with a row per run and server.
+    """
+    grid = list(itertools.product(strategies, num_servers, request_loads, seeds))
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown strategies: {sorted(unknown)}")
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = [(config, num_requests) for config in grid]
+
+    if max_workers == 1 or len(grid) == 1:
+        results = map(_run_config, tasks)
+        return pd.DataFrame([row for rows in results for row in rows])
+
+    # A few chunks per worker keeps the pool busy without paying IPC per run
+    chunksize = max(1, len(tasks) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_run_config, tasks, chunksize=chunksize))
+    return pd.DataFrame([row for rows in results for row in rows])
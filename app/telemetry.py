@@ -0,0 +1,254 @@
+import time
+
+import numpy as np
+
+from .sketch import DDSketch
+
+class RingBuffer:
+    """Fixed-size buffer of the most recent values with running lifetime statistics.
+
+    Memory stays at `capacity` values however long the buffer is fed, while
+    count, mean and max cover every value ever appended and come back in O(1).
+    """
+
+    def __init__(self, capacity=10000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._values = np.empty(capacity)
+        self._end = 0  # Position of the next write, modulo capacity
+        self._size = 0
+        self.count = 0
+        self.total = 0.0
+        self.peak = -np.inf
+
+    def append(self, value):
+        """Add a single value"""
+        self._values[self._end] = value
+        self._end = (self._end + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.count += 1
+        self.total += value
+        if value > self.peak:
+            self.peak = value
+
+    def extend(self, values):
+        """Add an array of values in one vectorized write"""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += values.sum()
+        self.peak = max(self.peak, values.max())
+
+        # Only the last `capacity` values can survive the write
+        values = values[-self.capacity:]
+        first = min(len(values), self.capacity - self._end)
+        self._values[self._end:self._end + first] = values[:first]
+        self._values[:len(values) - first] = values[first:]
+        self._end = (self._end + len(values)) % self.capacity
+        self._size = min(self._size + len(values), self.capacity)
+
+    def values(self):
+        """Return the retained values, oldest first"""
+        if self._size < self.capacity:
+            return self._values[:self._size].copy()
+        return np.concatenate((self._values[self._end:], self._values[:self._end]))
+
+    def tail(self, k):
+        """Return the last k retained values, oldest first, copying only those"""
+        k = min(k, self._size)
+        start = self._end - k
+        if start >= 0:
+            return self._values[start:self._end].copy()
+        return np.concatenate((self._values[start:], self._values[:self._end]))
+
+    def running_mean(self):
+        """Mean of every value appended so far"""
+        return self.total / self.count if self.count else 0.0
+
+    def running_max(self):
+        """Largest value appended so far"""
+        return self.peak if self.count else 0.0
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values()
+        return values if dtype is None else values.astype(dtype)
+
+class SlidingWindow:
+    """Statistics over the most recent values, by count (`size`) and/or age (`seconds`).
+
+    Values are kept in a ring with a running sum, so adding a value is O(1) and
+    mean() and ewma cost the same however long the window has been fed. The
+    quantile sketch and expiry by age are brought up to date in batches when a
+    statistic is read, or when the ring runs out of room. The EWMA is over every
+    value seen, weighting each new value by alpha.
+    """
+
+    def __init__(self, size=1000, seconds=None, alpha=0.1, clock=time.monotonic):
+        if size is None and seconds is None:
+            raise ValueError("A window needs a size, a duration or both")
+        self.size = size
+        self.seconds = seconds
+        self.alpha = alpha
+        # Number of values after which older ones no longer move the EWMA at float precision
+        self._ewma_span = int(np.ceil(np.log(np.finfo(float).eps) / np.log1p(-alpha))) if 0 < alpha < 1 else np.inf
+        self.clock = clock
+        # Ring positions are absolute value numbers modulo its capacity. It grows as needed,
+        # up to 2 * size, so values that left the window stay readable until the sketch drops them.
+        capacity = min(2 * size, 1024) if size is not None else 1024
+        self._values = np.empty(capacity)
+        self._times = np.empty(capacity) if seconds is not None else None  # Arrival time of each value
+        self._end = 0  # Number of values ever added; the window is the last `count` of them
+        self.count = 0
+        self.sum = 0.0
+        self.ewma = None
+        self._sketch = DDSketch()
+        self._sketched = (0, 0)  # Range of value numbers currently in the sketch
+        self._quantiles = {}  # q -> value, until the window changes
+
+    def append(self, value):
+        """Add a single value"""
+        capacity = len(self._values)
+        if self._end - self._sketched[0] == capacity:
+            self._make_room(1)
+            capacity = len(self._values)
+        position = self._end % capacity
+        self._values[position] = value
+        if self._times is not None:
+            self._times[position] = self.clock()
+        self._end += 1
+        self.count += 1
+        self.sum += value
+        if self.size is not None and self.count > self.size:
+            self.sum -= self._values[(self._end - self.count) % capacity]
+            self.count -= 1
+        self._quantiles.clear()
+        self.ewma = value if self.ewma is None else self.ewma + self.alpha * (value - self.ewma)
+
+    def extend(self, values):
+        """Add an array of values that arrived together"""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return
+
+        # ewma after k values is (1 - a)^k * ewma + a * sum((1 - a)^(k - 1 - i) * x_i)
+        start = values[0] if self.ewma is None else self.ewma
+        recent = values
+        if len(values) > self._ewma_span:
+            # Earlier values weigh less than float precision: start from the value before the span instead
+            start, recent = values[-self._ewma_span - 1], values[-self._ewma_span:]
+        decay = (1 - self.alpha) ** np.arange(len(recent) - 1, -1, -1)
+        self.ewma = float((1 - self.alpha) ** len(recent) * start + self.alpha * decay @ recent)
+
+        # Only the newest `size` values can stay in the window
+        if self.size is not None:
+            values = values[-self.size:]
+        if self._end + len(values) - self._sketched[0] > len(self._values):
+            self._make_room(len(values))
+        capacity = len(self._values)
+        position = self._end % capacity
+        first = min(len(values), capacity - position)
+        self._values[position:position + first] = values[:first]
+        self._values[:len(values) - first] = values[first:]
+        if self._times is not None:
+            now = self.clock()
+            self._times[position:position + first] = now
+            self._times[:len(values) - first] = now
+        self._end += len(values)
+        self.count += len(values)
+        self.sum += values.sum()
+        if self.size is not None and self.count > self.size:
+            self._drop(self.count - self.size)
+        self._quantiles.clear()
+
+    def _slice(self, array, start, stop):
+        """array's values for value numbers start..stop-1"""
+        if stop <= start:
+            return array[:0]
+        capacity = len(array)
+        first, last = start % capacity, (stop - 1) % capacity + 1
+        if first < last:
+            return array[first:last]
+        return np.concatenate((array[first:], array[:last]))
+
+    def _drop(self, n):
+        """Take the n oldest values out of the window"""
+        start = self._end - self.count
+        self.sum -= self._slice(self._values, start, start + n).sum()
+        self.count -= n
+        if not self.count:
+            self.sum = 0.0  # Don't carry rounding error into the next values
+
+    def _expire(self):
+        if self.seconds is None or not self.count:
+            return
+        # Arrival times increase around the ring, so the expired values are the oldest ones
+        start = self._end - self.count
+        times = self._slice(self._times, start, self._end)
+        expired = int(np.searchsorted(times, self.clock() - self.seconds))
+        if expired:
+            self._drop(expired)
+            self._quantiles.clear()
+
+    def _sync(self):
+        """Bring the sketch up to date with the window"""
+        start = self._end - self.count
+        sketched_start, sketched_end = self._sketched
+        self._sketch.remove_many(self._slice(self._values, sketched_start, min(sketched_end, start)))
+        self._sketch.add_many(self._slice(self._values, max(sketched_end, start), self._end))
+        self._sketched = (start, self._end)
+
+    def _make_room(self, n):
+        """Make room in the ring for n more values, growing it if expiring and syncing is not enough"""
+        self._expire()
+        self._sync()
+        capacity = len(self._values)
+        # Leave as much room as the window holds, so syncs come at most every `count` values
+        needed = self.count + max(n, self.count)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, 2 * capacity)
+        if self.size is not None:
+            new_capacity = min(new_capacity, 2 * self.size)
+        numbers = np.arange(self._end - self.count, self._end)
+        for name in ('_values', '_times'):
+            array = getattr(self, name)
+            if array is not None:
+                grown = np.empty(new_capacity)
+                grown[numbers % new_capacity] = array[numbers % capacity]
+                setattr(self, name, grown)
+
+    def values(self):
+        """Return the values in the window, oldest first"""
+        self._expire()
+        return self._slice(self._values, self._end - self.count, self._end).copy()
+
+    def mean(self):
+        """Mean of the values in the window"""
+        self._expire()
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Value at quantile q of the window, within the sketch's relative accuracy"""
+        self._expire()
+        if q not in self._quantiles:
+            self._sync()
+            self._quantiles[q] = self._sketch.quantile(q) if self.count else 0.0
+        return self._quantiles[q]
+
+    def __len__(self):
+        self._expire()
+        return self.count
+
+    def __bool__(self):
+        return len(self) > 0
@@ -1,33 +1,108 @@
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+# Points drawn per trace; longer series are downsampled on the server first
+MAX_POINTS = 2000
+
+def _numeric(x):
+    """Values usable in arithmetic, with timestamps as nanoseconds"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64) or x.dtype == object:
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+def lttb_indices(x, y, threshold):
+    """Indexes of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of threshold - 2 buckets in
+    between, the point forming the largest triangle with the previously kept point
+    and the average of the next bucket, which preserves the visual shape.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        average_x, average_y = x[end:next_end].mean(), y[end:next_end].mean()
+        areas = np.abs((x[kept] - average_x) * (y[start:end] - y[kept])
+                       - (x[kept] - x[start:end]) * (average_y - y[kept]))
+        kept = start + int(np.argmax(areas))
+        indices[bucket + 1] = kept
+    return indices
+
+def minmax_indices(y, threshold):
+    """Indexes of the smallest and largest point of each of threshold / 2 buckets, in order"""
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    buckets = max(threshold // 2, 1)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    filled = ~np.isnan(padded).all(axis=1)  # The last buckets can be all padding
+    offsets = np.arange(buckets)[filled] * size
+    lows = offsets + np.nanargmin(padded[filled], axis=1)
+    highs = offsets + np.nanargmax(padded[filled], axis=1)
+    return np.unique(np.concatenate((lows, highs)))
+
+def _envelope(x, lower, upper, threshold):
+    """Bucket starts with the lowest lower and highest upper bound of each bucket"""
+    n = len(x)
+    if threshold >= n:
+        return np.asarray(x), np.asarray(lower), np.asarray(upper)
+    size = -(-n // threshold)
+    starts = np.arange(0, n, size)
+    return (np.asarray(x)[starts], np.minimum.reduceat(np.asarray(lower, dtype=float), starts),
+            np.maximum.reduceat(np.asarray(upper, dtype=float), starts))
 
 class Visualizer:
     @staticmethod
-    def plot_forecast(forecast_df, actual_df, target_col='active_users'):
+    def downsample(x, y, max_points=MAX_POINTS, method='lttb'):
+        """Reduce a series to at most max_points points with LTTB or per-bucket min/max"""
+        if method == 'lttb':
+            indices = lttb_indices(x, y, max_points)
+        else:
+            indices = minmax_indices(np.asarray(y, dtype=float), max_points)
+        return np.asarray(x)[indices], np.asarray(y)[indices]
+
+    @staticmethod
+    def plot_forecast(forecast_df, actual_df, target_col='active_users', max_points=MAX_POINTS):
         """Create forecast vs actual plot"""
         fig = go.Figure()
 
         # Add actual values
-        fig.add_trace(go.Scatter(
-            x=actual_df['ds'],
-            y=actual_df['y'],
+        x, y = Visualizer.downsample(actual_df['ds'], actual_df['y'], max_points)
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
             name='Actual',
             line=dict(color='blue')
         ))
 
         # Add forecast
-        fig.add_trace(go.Scatter(
-            x=forecast_df['ds'],
-            y=forecast_df['yhat'],
+        x, y = Visualizer.downsample(forecast_df['ds'], forecast_df['yhat'], max_points)
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
             name='Forecast',
             line=dict(color='red')
         ))
 
-        # Add confidence intervals
-        fig.add_trace(go.Scatter(
-            x=forecast_df['ds'].tolist() + forecast_df['ds'].tolist()[::-1],
-            y=forecast_df['yhat_upper'].tolist() + forecast_df['yhat_lower'].tolist()[::-1],
+        # Add confidence intervals: upper bound forwards, then lower bound backwards
+        x, lower, upper = _envelope(forecast_df['ds'].to_numpy(), forecast_df['yhat_lower'].to_numpy(),
+                                    forecast_df['yhat_upper'].to_numpy(), max_points)
+        fig.add_trace(go.Scattergl(
+            x=np.concatenate((x, x[::-1])),
+            y=np.concatenate((upper, lower[::-1])),
             fill='toself',
             fillcolor='rgba(255,0,0,0.2)',
             line=dict(color='rgba(255,255,255,0)'),
@@ -67,7 +142,35 @@ class Visualizer:
         return fig
 
     @staticmethod
-    def plot_historical_data(data_df, target_col='load'):
+    def plot_historical_data(data_df, target_col='load', max_points=MAX_POINTS):
         """Create historical data analysis plot"""
-        fig = px.line(data_df, x='timestamp', y=target_col, title='Historical Load Data')
-        return fig
\ No newline at end of file
+        # Min/max buckets keep every spike visible, which matters more than shape here
+        x, y = Visualizer.downsample(data_df['timestamp'], data_df[target_col], max_points, method='minmax')
+        fig = go.Figure(go.Scattergl(x=x, y=y, name=target_col))
+        fig.update_layout(title='Historical Load Data', xaxis_title='timestamp', yaxis_title=target_col)
+        return fig
+
+    @staticmethod
+    def plot_rollup(rollups, target_col, start=None, end=None, max_points=MAX_POINTS):
+        """Plot mean, p95 and max of a metric from the coarsest rollup that fits in max_points"""
+        resolution = rollups.resolution_for(max_points=max_points, start=start, end=end)
+        rollup = rollups.get(resolution, start, end)
+
+        fig = go.Figure()
+        for stat, color in (('max', 'lightgray'), ('p95', 'orange'), ('mean', 'blue')):
+            x, y = Visualizer.downsample(rollup.index, rollup[f'{target_col}_{stat}'], max_points)
+            fig.add_trace(go.Scattergl(
+                x=x,
+                y=y,
+                name=stat,
+                line=dict(color=color)
+            ))
+
+        fig.update_layout(
+            title=f'{target_col} ({to_offset(resolution).freqstr} buckets)',
+            xaxis_title='Time',
+            yaxis_title=target_col,
+            hovermode='x unified'
+        )
+
+        return fig
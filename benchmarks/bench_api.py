@@ -0,0 +1,120 @@
+"""Load-test the /api/forecast and /api/load_balance endpoints under gunicorn"""
+import argparse
+import asyncio
+import collections
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+import numpy as np
+import pandas as pd
+
+from app.real_time_monitor import find_free_port
+
+
+def forecast_bodies(series, days, backend, periods):
+    """Distinct hourly series, in the columnar request format"""
+    rng = np.random.default_rng(0)
+    ds = pd.date_range('2024-01-01', periods=days * 24, freq='h')
+    hours = np.arange(len(ds))
+    epoch_ms = (ds.asi8 // 10**6).tolist()
+    bodies = []
+    for _ in range(series):
+        y = 100 + 30 * np.sin(2 * np.pi * hours / 24 + rng.uniform(0, 6)) + rng.normal(0, 5, len(ds))
+        bodies.append({'data': {'ds': epoch_ms, 'y': y.round(2).tolist()}, 'periods': periods, 'backend': backend})
+    return bodies
+
+
+def load_balance_bodies(requests):
+    rng = np.random.default_rng(1)
+    return [{'data': {'load': rng.normal(50, 10, requests).round(2).tolist()}, 'strategy': strategy,
+             'num_servers': 10, 'seed': 0}
+            for strategy in ('round_robin', 'least_connections', 'weighted_round_robin')]
+
+
+async def load(url, bodies, concurrency, duration, accept):
+    """Keep `concurrency` requests in flight for `duration` seconds, cycling through bodies"""
+    latencies, statuses, cache = [], collections.Counter(), collections.Counter()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset):
+            request = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                async with session.post(url, json=bodies[request % len(bodies)], headers={'Accept': accept}) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+                    cache[response.headers.get('X-Cache', '-')] += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+                request += 1
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return np.array(latencies), statuses, cache
+
+
+def report(name, result, duration):
+    latencies, statuses, cache = result
+    p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+    print(f"{name:<24} {len(latencies) / duration:8,.0f} req/s  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  "
+          f"p99.9 {p999:8.2f} ms  status {dict(statuses)}  cache {dict(cache)}")
+
+
+async def wait_until_up(url):
+    async with aiohttp.ClientSession() as session:
+        for _ in range(300):
+            try:
+                async with session.get(url):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("gunicorn did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--series', type=int, default=8, help="Distinct series the forecast requests cycle through")
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--periods', type=int, default=24)
+    parser.add_argument('--backend', default='prophet')
+    parser.add_argument('--batch', type=int, default=1000, help="Request loads per /api/load_balance call")
+    args = parser.parse_args()
+
+    port = find_free_port()
+    base = f'http://localhost:{port}'
+    with tempfile.TemporaryDirectory() as cache_dir:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-k', 'gthread', '-w', str(args.workers), '--threads', str(args.threads),
+             '-b', f'localhost:{port}', '--log-level', 'warning', 'app.api:create_app()'],
+            env={**os.environ, 'FORECAST_CACHE_DIR': cache_dir})
+        try:
+            asyncio.run(wait_until_up(base))
+            bodies = forecast_bodies(args.series, args.days, args.backend, args.periods)
+            # The first phase starts cold: every series is fitted once, concurrent requests wait for that fit
+            for phase in ('cold', 'warm'):
+                result = asyncio.run(load(f'{base}/api/forecast', bodies, args.concurrency, args.duration,
+                                          'application/json'))
+                report(f'forecast {phase} (json)', result, args.duration)
+            result = asyncio.run(load(f'{base}/api/forecast', bodies, args.concurrency, args.duration,
+                                      'application/vnd.apache.arrow.stream'))
+            report('forecast warm (arrow)', result, args.duration)
+            print(f"{'':<24} {len(os.listdir(cache_dir)) // 2} models fitted for {args.series} series "
+                  f"({args.workers} workers x {args.threads} threads, {args.backend})")
+
+            result = asyncio.run(load(f'{base}/api/load_balance', load_balance_bodies(args.batch), args.concurrency,
+                                      args.duration, 'application/json'))
+            report(f'load_balance x{args.batch}', result, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
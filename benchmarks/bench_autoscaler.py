@@ -0,0 +1,38 @@
+"""Compare reactive and predictive autoscaling on SLO violations and server-hours"""
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.data_processor import DataProcessor
+from app.scaling_simulation import simulate_autoscaling
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--eval-days', type=int, default=28)
+    parser.add_argument('--capacity', type=float, default=100, help="Active users one server handles")
+    parser.add_argument('--backend', default='fourier_ridge')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    np.random.seed(0)
+    data_processor = DataProcessor()
+    data_processor.generate_sample_data(days=args.days)
+    data = data_processor.prepare_prophet_data('active_users')
+    start = data['ds'].iloc[-1] - pd.Timedelta(days=args.eval_days)
+
+    summaries = [simulate_autoscaling(data, 'reactive', start, capacity_per_server=args.capacity)[1]]
+    for target_utilization in (0.7, 0.8):
+        summary = simulate_autoscaling(data, 'predictive', start, capacity_per_server=args.capacity,
+                                       backend=args.backend, target_utilization=target_utilization,
+                                       scale_down_margin=2, cooldown_up=0, cooldown_down=3 * 3600)[1]
+        summaries.append({**summary, 'mode': f"predictive @ {target_utilization:.0%}"})
+    print(pd.DataFrame(summaries).set_index('mode').round(3).to_string())
+
+
+if __name__ == '__main__':
+    main()
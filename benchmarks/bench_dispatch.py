@@ -0,0 +1,54 @@
+"""Compare per-request load balancing calls with LoadBalancer.dispatch_batch"""
+import argparse
+import time
+
+import numpy as np
+
+from app.load_balancer import LoadBalancer, STRATEGIES
+
+
+def run_per_request(strategy, loads, ips):
+    load_balancer = LoadBalancer(num_servers=10, seed=0)
+    method = getattr(load_balancer, strategy)
+    start = time.perf_counter()
+    if strategy == 'ip_hash':
+        for ip, load in zip(ips, loads):
+            method(ip, load)
+    else:
+        for load in loads:
+            method(load)
+    return time.perf_counter() - start
+
+
+def run_batch(strategy, loads, ips):
+    load_balancer = LoadBalancer(num_servers=10, seed=0)
+    start = time.perf_counter()
+    load_balancer.dispatch_batch(strategy, loads, ips if strategy == 'ip_hash' else None)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    loads = rng.uniform(10, 100, args.requests)
+    # 65,536 distinct clients, as dotted strings and as packed IPv4 integers
+    packed_ips = (192 << 24 | 168 << 16) + rng.integers(0, 65536, args.requests)
+    ips = [f"192.168.{ip >> 8 & 255}.{ip & 255}" for ip in packed_ips.tolist()]
+    loads_list = loads.tolist()
+
+    print(f"{'strategy':<22}{'per-request (s)':>16}{'batch (s)':>12}{'speedup':>10}")
+    for strategy in STRATEGIES:
+        per_request = run_per_request(strategy, loads_list, ips)
+        batch = run_batch(strategy, loads, ips)
+        print(f"{strategy:<22}{per_request:>16.3f}{batch:>12.3f}{per_request / batch:>9.0f}x")
+        if strategy == 'ip_hash':
+            per_request = run_per_request(strategy, loads_list, packed_ips.tolist())
+            batch = run_batch(strategy, loads, packed_ips)
+            print(f"{'ip_hash (packed IPs)':<22}{per_request:>16.3f}{batch:>12.3f}{per_request / batch:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Fit/predict latency and hold-out accuracy of each Forecaster backend"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from app.data_processor import DataProcessor
+from app.forecast_backends import BACKENDS
+from app.forecaster import Forecaster, forecast_model_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--horizon', type=int, default=24)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    np.random.seed(0)
+    data_processor = DataProcessor()
+    data_processor.generate_sample_data(days=args.days)
+    data = data_processor.prepare_prophet_data()
+    train, test = data.iloc[:-args.horizon], data['y'].to_numpy()[-args.horizon:]
+
+    print(f"{'backend':<16}{'fit (ms)':>10}{'predict (ms)':>14}{'MAE':>10}{'RMSE':>10}")
+    for backend in BACKENDS:
+        fit_times, predict_times = [], []
+        for _ in range(args.repeats):
+            forecaster = Forecaster(cache=forecast_model_cache(), backend=backend)
+            start = time.perf_counter()
+            forecaster.train(train)
+            fit_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            forecast = forecaster.predict(periods=args.horizon)
+            predict_times.append(time.perf_counter() - start)
+        errors = forecast['yhat'].to_numpy()[-args.horizon:] - test
+        print(f"{backend:<16}{np.median(fit_times) * 1e3:>10.1f}{np.median(predict_times) * 1e3:>14.1f}"
+              f"{np.abs(errors).mean():>10.2f}{np.sqrt((errors ** 2).mean()):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Throughput of Forecaster.predict_many as worker processes are added"""
+import argparse
+import logging
+import os
+import time
+
+import pandas as pd
+
+from app.data_processor import DataProcessor
+from app.forecaster import Forecaster, forecast_model_cache
+
+TARGETS = ['active_users', 'server_load', 'response_time']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--services', type=int, default=16)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    frames = []
+    for service in range(args.services):
+        frame = DataProcessor().generate_sample_data(days=args.days)
+        frames.append(frame.assign(service=f"service_{service}"))
+    data = pd.concat(frames, ignore_index=True)
+    num_models = args.services * len(TARGETS)
+
+    print(f"{'workers':>8}{'wall (s)':>10}{'models/s':>10}")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        # A fresh cache per run so every model is really fitted
+        forecaster = Forecaster(cache=forecast_model_cache())
+        start = time.perf_counter()
+        forecaster.predict_many(24, data=data, targets=TARGETS, series_col='service', max_workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>8}{elapsed:>10.2f}{num_models / elapsed:>10.2f}")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Warm-started Forecaster.update versus a cold full refit as hourly points arrive"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from app.data_processor import DataProcessor
+from app.forecaster import Forecaster, forecast_model_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--steps', type=int, default=12)
+    parser.add_argument('--max-window', default=None, help="e.g. '60D' to cap the warm-start window")
+    args = parser.parse_args()
+    logging.getLogger('cmdstanpy').setLevel(logging.WARNING)
+
+    np.random.seed(0)
+    data_processor = DataProcessor()
+    data_processor.generate_sample_data(days=args.days)
+    data = data_processor.prepare_prophet_data()
+    start_rows = len(data) - args.steps - 24
+
+    warm = Forecaster(cache=forecast_model_cache())
+    warm.train(data.iloc[:start_rows])
+    warm_times, cold_times, warm_errors, cold_errors, gaps = [], [], [], [], []
+    for step in range(args.steps):
+        end = start_rows + step + 1
+        actual = data['y'].iloc[end:end + 24].to_numpy()
+
+        start = time.perf_counter()
+        warm.update(data.iloc[end - 1:end], max_window=args.max_window)
+        warm_times.append(time.perf_counter() - start)
+        warm_forecast = warm.predict(periods=24)['yhat'].to_numpy()[-24:]
+
+        # A fresh forecaster with its own cache always fits from scratch
+        cold = Forecaster(cache=forecast_model_cache())
+        start = time.perf_counter()
+        cold.train(data.iloc[:end])
+        cold_times.append(time.perf_counter() - start)
+        cold_forecast = cold.predict(periods=24)['yhat'].to_numpy()[-24:]
+
+        warm_errors.append(np.abs(warm_forecast - actual).mean())
+        cold_errors.append(np.abs(cold_forecast - actual).mean())
+        gaps.append(np.abs(warm_forecast - cold_forecast).mean())
+
+    print(f"{'':<12}{'fit (s)':>10}{'next-24h MAE':>15}")
+    print(f"{'cold refit':<12}{np.median(cold_times):>10.3f}{np.mean(cold_errors):>15.2f}")
+    print(f"{'warm update':<12}{np.median(warm_times):>10.3f}{np.mean(warm_errors):>15.2f}")
+    print(f"mean |warm - cold| forecast difference: {np.mean(gaps):.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Least-connections selection cost as the number of servers grows"""
+import argparse
+import time
+
+import numpy as np
+
+from app.load_balancer import LoadBalancer
+
+
+def bench_heap(num_servers, finished):
+    """Select with LoadBalancer.least_connections and release a random open connection"""
+    load_balancer = LoadBalancer(num_servers=num_servers, seed=0)
+    in_flight = load_balancer.dispatch_batch('least_connections', np.ones(num_servers * 5))[0].tolist()
+    start = time.perf_counter()
+    for fraction in finished:
+        in_flight.append(load_balancer.least_connections(1.0)[0])
+        index = int(fraction * len(in_flight))
+        in_flight[index], in_flight[-1] = in_flight[-1], in_flight[index]
+        load_balancer.release(in_flight.pop())
+    return (time.perf_counter() - start) / len(finished)
+
+
+def bench_linear_scan(num_servers, finished):
+    """The previous selection: a full min() scan over a dict of counts"""
+    load_balancer = LoadBalancer(num_servers=num_servers, seed=0)
+    connection_counts = {server: 5 for server in range(num_servers)}
+    in_flight = [server for server in range(num_servers) for _ in range(5)]
+    start = time.perf_counter()
+    for fraction in finished:
+        selected_server = min(connection_counts, key=connection_counts.get)
+        load, response_time = load_balancer._simulate(1.0)
+        load_balancer.record(selected_server, load, response_time)
+        connection_counts[selected_server] += 1
+        in_flight.append(selected_server)
+        index = int(fraction * len(in_flight))
+        in_flight[index], in_flight[-1] = in_flight[-1], in_flight[index]
+        connection_counts[in_flight.pop()] -= 1
+    return (time.perf_counter() - start) / len(finished)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--selections', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'servers':>8}{'heap (us/request)':>20}{'linear scan (us/request)':>27}")
+    for num_servers in (10, 100, 1000, 10000):
+        # Steady state: each new request is followed by one random in-flight request finishing
+        finished = rng.random(args.selections).tolist()
+        heap_time = bench_heap(num_servers, finished)
+        scan_time = bench_linear_scan(num_servers, finished[:max(200, 200_000 // num_servers)])
+        print(f"{num_servers:>8}{heap_time * 1e6:>20.2f}{scan_time * 1e6:>27.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Time DataProcessor.load_data on a large Parquet file (100M rows by default)"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.data_processor import DataProcessor
+
+
+def write_parquet(path, rows, row_group_rows=1_000_000, seed=0):
+    """Write per-second telemetry with an extra unused column, one row group at a time"""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 'ns')
+    writer = None
+    for offset in range(0, rows, row_group_rows):
+        size = min(row_group_rows, rows - offset)
+        table = pa.table({
+            'timestamp': start + np.arange(offset, offset + size).astype('timedelta64[s]'),
+            'active_users': rng.normal(1000, 200, size),
+            'server_load': rng.normal(60, 15, size),
+            'response_time': rng.normal(200, 50, size),
+            'host': pa.array(rng.integers(0, 64, size)).cast(pa.string())
+        })
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    data = function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:7.2f} s  {len(data):>12,} rows  {data.memory_usage(deep=True).sum() / 2**20:>8.0f} MiB")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000_000)
+    parser.add_argument('--path', default='/tmp/telemetry.parquet')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path) or pq.ParquetFile(args.path).metadata.num_rows != args.rows:
+        start = time.perf_counter()
+        write_parquet(args.path, args.rows)
+        print(f"wrote {args.rows:,} rows to {args.path} in {time.perf_counter() - start:.1f} s "
+              f"({os.path.getsize(args.path) / 2**20:.0f} MiB)")
+
+    data_processor = DataProcessor()
+    first = pd.Timestamp('2024-01-01')
+    last = first + pd.Timedelta(seconds=args.rows)
+    timed("pandas.read_parquet (all columns)", lambda: pd.read_parquet(args.path))
+    timed("load_data (metric columns)", lambda: data_processor.load_data(args.path))
+    timed("load_data (one metric)", lambda: data_processor.load_data(args.path, columns=['timestamp', 'server_load']))
+    timed("load_data (last day)", lambda: data_processor.load_data(args.path, start=last - pd.Timedelta('1D')))
+    timed("load_data (one hour, mid-file)",
+          lambda: data_processor.load_data(args.path, start=first + (last - first) / 2,
+                                           end=first + (last - first) / 2 + pd.Timedelta('1h')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Load-test RealTimeMonitor with many local WebSocket clients against the previous per-client loop"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+
+import numpy as np
+import websockets
+
+from app.load_balancer import LoadBalancer
+from app.real_time_monitor import RealTimeMonitor, find_free_port
+
+
+class LegacyMonitor:
+    """The previous monitor: metrics recomputed and sent in full for every client every tick"""
+
+    def __init__(self, load_balancer, tick):
+        self.load_balancer = load_balancer
+        self.tick = tick
+
+    async def monitor_load(self, websocket, path=None):
+        try:
+            while True:
+                await websocket.send(json.dumps(self.load_balancer.get_server_metrics()))
+                await asyncio.sleep(self.tick)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+async def serve(mode, port, servers, tick, duration, idle_fraction, ready, result):
+    load_balancer = LoadBalancer(num_servers=servers, seed=0)
+    monitor = RealTimeMonitor(load_balancer, tick=tick) if mode == 'shared' else LegacyMonitor(load_balancer, tick)
+    rng = np.random.default_rng(0)
+
+    async def traffic():
+        # Requests arrive on most ticks; on idle ticks nothing changes
+        while True:
+            if rng.random() >= idle_fraction:
+                load_balancer.dispatch_batch('round_robin', rng.normal(50, 10, 1000))
+            await asyncio.sleep(tick)
+
+    async with websockets.serve(monitor.monitor_load, 'localhost', port, max_size=None):
+        traffic_task = asyncio.create_task(traffic())
+        ready.set()
+        await asyncio.sleep(2)  # Let the clients connect
+        start = time.process_time()
+        await asyncio.sleep(duration)
+        result.put(time.process_time() - start)
+        traffic_task.cancel()
+
+
+def run_server(*args):
+    logging.disable(logging.ERROR)  # Every connection logs an error when the server shuts down
+    asyncio.run(serve(*args))
+
+
+async def run_clients(port, clients, duration):
+    counts = {'messages': 0, 'bytes': 0}
+
+    async def client():
+        async with websockets.connect(f'ws://localhost:{port}', max_size=None, open_timeout=30) as websocket:
+            async for message in websocket:
+                if measuring:
+                    counts['messages'] += 1
+                    counts['bytes'] += len(message)
+
+    measuring = False
+    tasks = [asyncio.create_task(client()) for _ in range(clients)]
+    await asyncio.sleep(2)
+    measuring = True
+    await asyncio.sleep(duration)
+    measuring = False
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--servers', type=int, default=10)
+    parser.add_argument('--tick', type=float, default=0.5)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--idle-fraction', type=float, default=0.5)
+    args = parser.parse_args()
+
+    for mode in ('legacy', 'shared'):
+        port = find_free_port()
+        ready, result = multiprocessing.Event(), multiprocessing.Queue()
+        server = multiprocessing.Process(target=run_server, args=(
+            mode, port, args.servers, args.tick, args.duration, args.idle_fraction, ready, result))
+        server.start()
+        ready.wait()
+        counts = asyncio.run(run_clients(port, args.clients, args.duration))
+        cpu = result.get()
+        server.join()
+        print(f"{mode:<7} server CPU {cpu:6.2f} s  messages {counts['messages']:>8,}  "
+              f"received {counts['bytes'] / 2**20:7.2f} MiB  ({args.clients} clients, {args.duration:.0f} s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Time and peak memory of DataProcessor.preprocess_data against the previous implementation"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.data_processor import DataProcessor
+
+
+def legacy_preprocess(data):
+    """preprocess_data as it was before the float32/int8 pipeline"""
+    data = data.ffill()
+    for column in ['active_users', 'server_load', 'response_time']:
+        Q1 = data[column].quantile(0.25)
+        Q3 = data[column].quantile(0.75)
+        IQR = Q3 - Q1
+        data[column] = data[column].clip(Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+    data['hour'] = data['timestamp'].dt.hour
+    data['day_of_week'] = data['timestamp'].dt.dayofweek
+    data['is_weekend'] = data['day_of_week'].isin([5, 6]).astype(int)
+    return data
+
+
+def make_data(rows, seed=0):
+    """Per-minute telemetry with a few gaps and outliers"""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=rows, freq='min'),
+        'active_users': rng.normal(1000, 200, rows),
+        'server_load': rng.normal(60, 15, rows),
+        'response_time': rng.normal(200, 50, rows)
+    })
+    gaps = rng.random(rows) < 0.001
+    data.loc[gaps, 'server_load'] = np.nan
+    data.loc[rng.random(rows) < 0.001, 'response_time'] *= 10
+    return data
+
+
+def measure(function, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(data)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = make_data(args.rows)
+    print(f"input: {args.rows:,} rows, {data.memory_usage(deep=True).sum() / 2**20:.0f} MiB")
+
+    legacy, legacy_time, legacy_peak = measure(legacy_preprocess, data)
+    current, current_time, current_peak = measure(lambda frame: DataProcessor().preprocess_data(frame), data)
+    chunks = lambda: (data.iloc[start:start + args.chunk_rows] for start in range(0, len(data), args.chunk_rows))
+    _, chunked_time, chunked_peak = measure(lambda frame: sum(len(chunk) for chunk in DataProcessor().preprocess_chunks(chunks)), data)
+
+    for label, elapsed, peak, result in (('legacy', legacy_time, legacy_peak, legacy),
+                                         ('optimized', current_time, current_peak, current),
+                                         ('chunked', chunked_time, chunked_peak, None)):
+        size = f"{result.memory_usage(deep=True).sum() / 2**20:>7.0f} MiB" if result is not None else '        -'
+        print(f"{label:<10} {elapsed:6.2f} s  peak {peak / 2**20:7.0f} MiB  result {size}")
+
+    difference = np.abs(legacy[['active_users', 'server_load', 'response_time']].to_numpy()
+                        - current[['active_users', 'server_load', 'response_time']].to_numpy()).max()
+    print(f"max abs difference vs legacy: {difference:.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Load-test LoadBalancingProxy against local stub backends: requests/sec and added latency"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import time
+
+import aiohttp
+import numpy as np
+from aiohttp import web
+
+from app.proxy import LoadBalancingProxy
+from app.real_time_monitor import find_free_port
+
+
+async def serve_backends(ports, delay, ready, stop):
+    async def handle(request):
+        if delay:
+            await asyncio.sleep(delay)
+        return web.Response(text='ok')
+
+    runners = []
+    for port in ports:
+        app = web.Application()
+        app.router.add_get('/{path:.*}', handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, 'localhost', port).start()
+        runners.append(runner)
+    ready.set()
+    await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+    for runner in runners:
+        await runner.cleanup()
+
+
+async def serve_proxy(port, backends, strategy, ready, stop, result):
+    proxy = LoadBalancingProxy(backends, strategy)
+    runner = web.AppRunner(proxy.make_app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, 'localhost', port).start()
+    ready.set()
+    await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+    result.put({server: times.count for server, times in proxy.load_balancer.server_response_times.items()})
+    await runner.cleanup()
+
+
+def run(coroutine, *args):
+    logging.disable(logging.WARNING)
+    asyncio.run(coroutine(*args))
+
+
+async def load(urls, concurrency, duration):
+    """Keep `concurrency` requests in flight for `duration` seconds; return the latencies in ms"""
+    latencies = []
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset):
+            request = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                async with session.get(urls[request % len(urls)]) as response:
+                    await response.read()
+                latencies.append((time.perf_counter() - start) * 1000)
+                request += 1
+
+        await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    return np.array(latencies)
+
+
+def report(name, latencies, duration):
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"{name:<28} {len(latencies) / duration:9,.0f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    return p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--delay', type=float, default=0.005, help="Backend service time in seconds")
+    parser.add_argument('--strategies', nargs='+', default=['round_robin', 'least_connections'])
+    args = parser.parse_args()
+
+    ports = [find_free_port() for _ in range(args.backends)]
+    backends = [f'http://localhost:{port}' for port in ports]
+    ready, stop = multiprocessing.Event(), multiprocessing.Event()
+    backend_process = multiprocessing.Process(target=run, args=(serve_backends, ports, args.delay, ready, stop))
+    backend_process.start()
+    ready.wait()
+
+    direct = asyncio.run(load(backends, args.concurrency, args.duration))
+    direct_p99 = report('direct', direct, args.duration)
+    for strategy in args.strategies:
+        port = find_free_port()
+        proxy_ready, proxy_stop, result = multiprocessing.Event(), multiprocessing.Event(), multiprocessing.Queue()
+        proxy_process = multiprocessing.Process(target=run, args=(
+            serve_proxy, port, backends, strategy, proxy_ready, proxy_stop, result))
+        proxy_process.start()
+        proxy_ready.wait()
+        proxied = asyncio.run(load([f'http://localhost:{port}/'], args.concurrency, args.duration))
+        proxy_stop.set()
+        recorded = result.get()
+        proxy_process.join()
+        p99 = report(f'proxy ({strategy})', proxied, args.duration)
+        print(f"{'':<28} added p99 {p99 - direct_p99:+.2f} ms, response times recorded per server {recorded}")
+
+    stop.set()
+    backend_process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Wall time of the discrete-event simulator per strategy (one arrival + one departure per request)"""
+import argparse
+import time
+
+from app.load_balancer import LoadBalancer, STRATEGIES
+from app.simulator import PoissonArrivals, Simulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--events', type=int, default=10_000_000)
+    parser.add_argument('--servers', type=int, default=10)
+    args = parser.parse_args()
+    num_requests = args.events // 2
+
+    print(f"{'strategy':<22}{'wall (s)':>10}{'events/s':>14}{'avg wait (s)':>14}{'p99 (s)':>10}")
+    for strategy in STRATEGIES:
+        load_balancer = LoadBalancer(num_servers=args.servers, seed=0)
+        simulator = Simulator(load_balancer, strategy, capacity=4, service_rate=100.0)
+        # 90% utilization: servers x slots x rate / mean load
+        arrivals = PoissonArrivals(rate=0.9 * args.servers * 4 * 100.0 / 50, mean_load=50, num_clients=100_000, seed=0)
+        start = time.perf_counter()
+        results = simulator.run(arrivals, num_requests)
+        elapsed = time.perf_counter() - start
+        summary = Simulator.summarize(results)
+        print(f"{strategy:<22}{elapsed:>10.2f}{args.events / elapsed:>14,.0f}"
+              f"{summary['avg_wait']:>14.3f}{summary['p99_response_time']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Scaling of LoadBalancer sweeps with the number of worker processes"""
+import argparse
+import os
+import time
+
+from app.sweep import run_sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200_000)
+    parser.add_argument('--seeds', type=int, default=8)
+    args = parser.parse_args()
+
+    kwargs = dict(num_servers=(3, 10, 50), request_loads=(20, 80), seeds=range(args.seeds), num_requests=args.requests)
+    baseline = None
+    print(f"{'workers':>8}{'wall (s)':>10}{'speedup':>10}")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        frame = run_sweep(max_workers=workers, **kwargs)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{baseline / elapsed:>9.1f}x")
+        workers *= 2
+    print(f"{frame.groupby(['strategy', 'num_servers', 'request_load', 'seed']).ngroups} runs, {len(frame)} rows")
+
+
+if __name__ == '__main__':
+    main()
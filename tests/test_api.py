@@ -0,0 +1,96 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.api import ARROW_MIMETYPE, MAX_SERVERS, ForecastService, create_app
+from app.forecaster import Forecaster
+
+
+@pytest.fixture
+def client():
+    return create_app().test_client()
+
+
+def series_body(**options):
+    ds = pd.date_range('2024-01-01', periods=24 * 14, freq='h')
+    y = 100 + 10 * np.sin(2 * np.pi * np.arange(len(ds)) / 24)
+    return {'data': {'ds': (ds.asi8 // 10**6).tolist(), 'y': y.tolist()}, 'backend': 'fourier_ridge', **options}
+
+
+def arrow_body(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def test_forecast_returns_columnar_json(client):
+    response = client.post('/api/forecast', json=series_body(periods=12, model_params={'daily_order': 3}))
+    assert response.status_code == 200
+    assert response.json['columns'] == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    assert len(response.json['data']['yhat']) == 12
+
+
+def test_concurrent_forecasts_of_one_series_fit_once(monkeypatch):
+    fits = []
+    fit = Forecaster._fit
+
+    def slow_fit(self, data, init=None):
+        fits.append(1)
+        time.sleep(0.2)  # Long enough for every request to arrive while the first one fits
+        fit(self, data, init)
+
+    monkeypatch.setattr(Forecaster, '_fit', slow_fit)
+    body = series_body()
+    data = pd.DataFrame({'ds': pd.to_datetime(body['data']['ds'], unit='ms'), 'y': body['data']['y']})
+    service = ForecastService()
+    results = {}
+
+    def request(periods):
+        results[periods] = service.forecast(data, periods=periods, backend='fourier_ridge')
+
+    threads = [threading.Thread(target=request, args=(periods,)) for periods in (24, 48, 72)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fits) == 1
+    assert sorted(status for _, status in results.values()) == ['coalesced', 'coalesced', 'miss']
+    assert {periods: len(forecast) for periods, (forecast, _) in results.items()} == {24: 24, 48: 48, 72: 72}
+
+
+@pytest.mark.parametrize('model_params', [{'unknown': 1}, {'daily_order': 500}, {'daily_order': 2.5},
+                                          {'alpha': True}, 'not json'])
+def test_forecast_rejects_invalid_model_params(client, model_params):
+    response = client.post('/api/forecast', json=series_body(model_params=model_params))
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+def test_load_balance_limits_num_servers(client):
+    body = {'data': {'load': [1.0, 2.0]}, 'num_servers': MAX_SERVERS + 1}
+    response = client.post('/api/load_balance', json=body)
+    assert response.status_code == 400
+    assert 'num_servers' in response.json['error']
+
+
+def test_load_balance_reads_weights_and_seed_from_the_query_string(client):
+    body = arrow_body(pd.DataFrame({'load': [10.0] * 8}))
+    url = '/api/load_balance?strategy=weighted_round_robin&num_servers=3&weights=0,0,1&seed=3'
+    responses = [client.post(url, data=body, content_type=ARROW_MIMETYPE) for _ in range(2)]
+    assert responses[0].json['data']['server'] == [2] * 8
+    assert responses[0].json['data']['load'] == responses[1].json['data']['load']
+
+
+def test_load_balance_failures_are_json(client, monkeypatch):
+    monkeypatch.setattr('app.api.LoadBalancer.get_latency_sketch', lambda self: 1 / 0)
+    response = client.post('/api/load_balance', json={'data': {'load': [1.0]}})
+    assert response.status_code == 500
+    assert response.json == {'error': 'Load balancing failed'}
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.data_processor import DataProcessor
+
+
+def new_rows(processor, hours=5):
+    rows = processor.data.tail(hours)[['timestamp', 'active_users', 'server_load', 'response_time']].copy()
+    rows['timestamp'] += pd.Timedelta(hours=hours)
+    return rows
+
+
+def test_append_preprocesses_data_replaced_after_an_earlier_preprocessing():
+    processor = DataProcessor()
+    processor.generate_sample_data(days=10)
+    processor.preprocess_data()
+    processor.generate_sample_data(days=10)  # Raw again, with the old bounds still set
+    processor.append(new_rows(processor))
+
+    data = processor.data
+    assert not data[['hour', 'day_of_week', 'is_weekend']].isna().any().any()
+    assert (data[['active_users', 'server_load', 'response_time']].dtypes == np.float32).all()
+
+
+def test_append_bounds_follow_negative_metrics():
+    rng = np.random.default_rng(0)
+    timestamps = pd.date_range('2024-01-01', periods=2000, freq='h')
+    data = pd.DataFrame({'timestamp': timestamps, 'server_load': rng.normal(-50, 10, len(timestamps))})
+    processor = DataProcessor()
+    processor.preprocess_data(data.iloc[:1000])
+    processor.append(data.iloc[1000:])
+
+    q1, q3 = np.quantile(data['server_load'].to_numpy(dtype=np.float32), [0.25, 0.75])
+    lower, upper = processor.bounds['server_load']
+    assert lower == pytest.approx(q1 - 1.5 * (q3 - q1), rel=0.05)
+    assert upper == pytest.approx(q3 + 1.5 * (q3 - q1), rel=0.05)
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import forecaster as forecaster_module
+from app.backtest import Backtester
+from app.forecaster import Forecaster, forecast_model_cache
+
+
+def wide_frame(level, days=14):
+    timestamps = pd.date_range('2024-01-01', periods=days * 24, freq='h')
+    hours = np.arange(len(timestamps))
+    return pd.DataFrame({'timestamp': timestamps, 'cpu': level + 10 * np.sin(2 * np.pi * hours / 24)})
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_train_many_does_not_leave_series_in_the_module_global(max_workers):
+    forecaster = Forecaster(backend='fourier_ridge')
+    forecast = forecaster.predict_many(periods=6, data=wide_frame(100), targets='cpu', max_workers=max_workers)
+    assert len(forecast) == 14 * 24 + 6
+    assert forecaster_module._worker_series is None
+
+
+def test_concurrent_serial_batches_use_their_own_series():
+    levels = [100, 1000, 10000, 100000]
+    results = {}
+
+    def run(level):
+        # A separate cache per thread, so every thread really fits its own series
+        forecaster = Forecaster(backend='fourier_ridge', cache=forecast_model_cache())
+        forecast = forecaster.predict_many(periods=24, data=wide_frame(level), targets='cpu', max_workers=1)
+        results[level] = forecast['yhat'].tail(24).mean()
+
+    threads = [threading.Thread(target=run, args=(level,)) for _ in range(5) for level in levels]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for level in levels:
+        assert results[level] == pytest.approx(level, rel=0.05)
+
+
+def test_backtest_runs_serially_without_worker_globals():
+    data = wide_frame(100).rename(columns={'timestamp': 'ds', 'cpu': 'y'})
+    result = Backtester(backend='fourier_ridge').run(data, horizon=12, num_cutoffs=3, max_workers=1)
+    assert result['cutoff'].nunique() == 3
+    assert forecaster_module._worker_series is None
+
+
+def test_backtest_reuses_fits_across_horizons_and_many_cutoffs():
+    data = wide_frame(100, days=30).rename(columns={'timestamp': 'ds', 'cpu': 'y'})
+    backtester = Backtester(backend='fourier_ridge', max_horizon=24)
+    backtester.run(data, horizon=24, num_cutoffs=40, max_workers=1)
+    cache = backtester.forecaster.cache
+    misses = cache.misses
+
+    short = backtester.run(data, horizon=12, num_cutoffs=40, max_workers=1)
+    backtester.run(data, horizon=24, num_cutoffs=40, max_workers=1)
+
+    assert cache.misses == misses  # Same cutoffs for both horizons, and all 40 fits stay cached
+    assert short['cutoff'].nunique() == 40
+    assert short['step'].max() == 12
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from app.hash_ring import HashRing
+from app.load_balancer import LoadBalancer
+
+KEYS = np.random.default_rng(0).integers(0, 2**64, 200_000, dtype=np.uint64)  # Uniform over the ring
+
+
+@pytest.mark.parametrize('old_nodes, new_nodes', [(range(5), range(6)), (range(6), range(5)),
+                                                  (range(10), [0, 2, 4, 11, 12]), (range(3), range(3))])
+def test_moved_fraction_matches_the_share_of_keys_that_move(old_nodes, new_nodes):
+    ring = HashRing(old_nodes, vnodes=50)
+    before = ring.get_nodes(KEYS)
+    moved = ring.set_nodes(new_nodes)
+
+    assert moved == pytest.approx((ring.get_nodes(KEYS) != before).mean(), abs=0.01)
+
+
+def test_adding_one_node_moves_about_its_share_of_keys():
+    ring = HashRing(range(9), vnodes=100)
+    assert ring.add_node(9) == pytest.approx(1 / 10, abs=0.03)
+    assert ring.remove_node(9) == pytest.approx(1 / 10, abs=0.03)
+
+
+@pytest.mark.parametrize('hash_mode', ['consistent', 'modulo'])
+def test_load_balancer_remap_fraction_matches_moved_keys(hash_mode):
+    load_balancer = LoadBalancer(num_servers=4, hash_mode=hash_mode)
+    before = load_balancer._hash_servers(KEYS)
+    load_balancer.num_servers = 6
+
+    moved = (load_balancer._hash_servers(KEYS) != before).mean()
+    assert load_balancer.last_remap_fraction == pytest.approx(moved, abs=0.01)
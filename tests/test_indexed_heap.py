@@ -0,0 +1,34 @@
+import numpy as np
+
+from app.indexed_heap import IndexedHeap
+
+
+def check_invariants(heap, expected):
+    entries = heap._heap
+    for position in range(1, len(entries)):
+        assert not entries[position] < entries[(position - 1) >> 1]
+    assert {key: position for position, (_, key) in enumerate(entries)} == heap._positions
+    assert {key: priority for priority, key in entries} == expected
+    if expected:
+        assert heap.peek() == min(expected, key=lambda key: (expected[key], key))
+
+
+def test_heap_keeps_its_invariants_under_random_operations():
+    rng = np.random.default_rng(0)
+    heap, expected = IndexedHeap(), {}
+    for _ in range(3000):
+        operation = rng.integers(4)
+        key = int(rng.integers(60))
+        if operation == 0 and key not in expected:
+            expected[key] = int(rng.integers(-5, 20))
+            heap.push(key, expected[key])
+        elif operation == 1 and key in expected:
+            assert heap.remove(key) == expected.pop(key)
+        elif operation == 2 and key in expected:
+            delta = int(rng.integers(-6, 7))
+            expected[key] += delta
+            assert heap.increment(key, delta) == expected[key]
+        elif operation == 3 and key in expected:
+            expected[key] = int(rng.integers(-5, 20))
+            heap.update(key, expected[key])
+        check_invariants(heap, expected)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from app.hash_ring import stable_hash, stable_hashes
+from app.load_balancer import LoadBalancer
+
+
+def test_stable_hashes_match_stable_hash():
+    keys = ['10.0.0.1', '192.168.1.20', 'client-7', 42]
+    assert stable_hashes(keys).tolist() == [stable_hash(key) for key in keys]
+
+
+@pytest.mark.parametrize('hash_mode', ['consistent', 'modulo'])
+def test_ip_hash_batch_matches_per_request_calls(hash_mode):
+    rng = np.random.default_rng(0)
+    loads = rng.uniform(10, 100, 2000)
+    ips = [f"10.0.{i // 256}.{i % 256}" for i in rng.integers(0, 500, len(loads))]
+
+    per_request = LoadBalancer(num_servers=7, seed=1, hash_mode=hash_mode)
+    expected = [per_request.ip_hash(ip, load)[0] for ip, load in zip(ips, loads)]
+    batch = LoadBalancer(num_servers=7, seed=1, hash_mode=hash_mode)
+    servers, _, _ = batch.dispatch_batch('ip_hash', loads, ips)
+
+    assert servers.tolist() == expected
+    assert batch.load_windows[0].ewma == pytest.approx(per_request.load_windows[0].ewma)
+
+
+def test_integer_ips_batch_matches_per_request_calls():
+    rng = np.random.default_rng(0)
+    loads = rng.uniform(10, 100, 2000)
+    ips = (10 << 24) + rng.integers(0, 500, len(loads))  # Packed IPv4 addresses
+
+    per_request = LoadBalancer(num_servers=7, seed=1)
+    expected = [per_request.ip_hash(ip, load)[0] for ip, load in zip(ips.tolist(), loads)]
+    servers, _, _ = LoadBalancer(num_servers=7, seed=1).dispatch_batch('ip_hash', loads, ips)
+
+    assert servers.tolist() == expected
+
+
+@pytest.mark.parametrize('n', [1, 7, 50, 1000])
+def test_least_connections_batch_matches_per_request_selection_with_uneven_counts(n):
+    def uneven():
+        load_balancer = LoadBalancer(num_servers=6, seed=0)
+        for _ in range(54):
+            load_balancer.select('least_connections')
+        for server, released in enumerate([4, 9, 6, 6, 0, 8]):
+            for _ in range(released):
+                load_balancer.release(server)
+        assert list(load_balancer.connection_counts.values()) == [5, 0, 3, 3, 9, 1]
+        return load_balancer
+
+    per_request, batch = uneven(), uneven()
+    expected = [per_request.select('least_connections') for _ in range(n)]
+
+    assert batch.select_batch('least_connections', n).tolist() == expected
+    assert batch.connection_counts == per_request.connection_counts
@@ -0,0 +1,137 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.notifications import NotificationDispatcher
+
+
+class Recorder:
+    """aiosmtpd handler that keeps every message and refuses recipients starting with 'bad'"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, options):
+        if address.startswith('bad'):
+            return '550 No such user'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.rcpt_tos, envelope.content.decode()))
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = Recorder()
+    controller = Controller(handler, hostname='localhost', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def dispatcher(controller, **options):
+    options = {'digest_window': 0.2, 'rate': 1000, 'burst': 100, **options}
+    return NotificationDispatcher('localhost', controller.port, from_email='alerts@example.com', **options)
+
+
+def subjects(handler):
+    return [next(line for line in content.splitlines() if line.startswith('Subject:'))
+            for _, content in handler.messages]
+
+
+def test_burst_is_deduplicated_and_sent_as_one_digest_per_recipient(smtp_server):
+    controller, handler = smtp_server
+    notifications = dispatcher(controller)
+    for i in range(30):
+        notifications.notify(f"alert {i % 20}", 'ops@example.com', details="cpu high")
+    notifications.notify("forecast ready", 'dev@example.com')
+    assert notifications.flush(10)
+    notifications.close()
+
+    assert notifications.deduplicated == 10
+    assert notifications.connections == 1
+    assert sorted(recipients for recipients, _ in handler.messages) == [['dev@example.com'], ['ops@example.com']]
+    assert 'Subject: 20 notifications from Application Load Analyzer' in subjects(handler)
+
+
+def test_same_message_with_new_details_is_not_dropped(smtp_server):
+    controller, handler = smtp_server
+    notifications = dispatcher(controller, digest_window=0)
+    for run in range(3):
+        assert notifications.notify("Forecast generated successfully.", 'ops@example.com', details=f"run {run}")
+        assert notifications.flush(10)
+    assert not notifications.notify("Forecast generated successfully.", 'ops@example.com', details="run 2")
+    notifications.close()
+
+    assert len(handler.messages) == 3
+    assert notifications.connections == 1  # The connection is reused between sends
+
+
+def test_rate_limit_follows_the_injected_clock():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    notifications = NotificationDispatcher(rate=2, burst=3, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        notifications._take_token()
+    assert sleeps == pytest.approx([0.5, 0.5])
+    now[0] += 10  # Idle time refills the bucket up to the burst size only
+    for _ in range(3):
+        notifications._take_token()
+    assert len(sleeps) == 2
+
+
+def test_failed_sends_are_retried_with_backoff_until_the_server_is_up():
+    handler = Recorder()
+    controller = Controller(handler, hostname='localhost', port=free_port())
+    delays = []
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 3:
+            controller.start()
+
+    notifications = dispatcher(controller, digest_window=0, backoff=0.5, sleep=sleep)
+    try:
+        notifications.notify("retry me", 'ops@example.com')
+        assert notifications.flush(10)
+        notifications.close()
+    finally:
+        controller.stop()
+
+    assert delays == [0.5, 1.0, 2.0]
+    assert notifications.sent == 1
+    assert len(handler.messages) == 1
+
+
+def test_rejected_recipient_is_not_retried(smtp_server):
+    controller, handler = smtp_server
+    delays = []
+    notifications = dispatcher(controller, digest_window=0, sleep=delays.append)
+    notifications.notify("x", 'bad@example.com')
+    assert notifications.flush(10)
+    notifications.close()
+
+    assert notifications.failed == 1
+    assert delays == []
+
+
+def test_close_delivers_queued_notifications(smtp_server):
+    controller, handler = smtp_server
+    notifications = dispatcher(controller, digest_window=5)
+    notifications.notify("pending", 'ops@example.com')
+    notifications.close()
+    assert len(handler.messages) == 1
@@ -0,0 +1,101 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer, make_mocked_request
+
+from app.proxy import LoadBalancingProxy
+
+
+def backend_app():
+    async def upload(request):
+        size = 0
+        async for chunk in request.content.iter_chunked(65536):
+            size += len(chunk)
+        return web.json_response({'received': size})
+
+    async def download(request):
+        response = web.StreamResponse()
+        response.content_length = 8 * 2**20
+        await response.prepare(request)
+        for _ in range(128):
+            await response.write(b'x' * 65536)
+        return response
+
+    async def ok(request):
+        return web.Response(text='ok')
+
+    async def slow(request):
+        await asyncio.sleep(5)
+        return web.Response(text='late')
+
+    app = web.Application()
+    app.router.add_post('/upload', upload)
+    app.router.add_get('/download', download)
+    app.router.add_get('/slow', slow)
+    app.router.add_route('*', '/{path:.*}', ok)
+    return app
+
+
+async def proxied(backends, **options):
+    proxy = LoadBalancingProxy(backends, health_interval=0, **options)
+    server = TestServer(proxy.make_app())
+    await server.start_server()
+    return proxy, server
+
+
+def test_large_bodies_stream_through_the_proxy():
+    async def scenario():
+        backend = TestServer(backend_app())
+        await backend.start_server()
+        proxy, server = await proxied([str(backend.make_url(''))])
+        async with aiohttp.ClientSession() as session:
+            # Larger than aiohttp's default 1 MiB request limit, which only applies to buffered bodies
+            async with session.post(server.make_url('/upload'), data=b'y' * (8 * 2**20)) as response:
+                assert response.status == 200
+                assert (await response.json()) == {'received': 8 * 2**20}
+            async with session.get(server.make_url('/download')) as response:
+                assert response.status == 200
+                assert len(await response.read()) == 8 * 2**20
+            async with session.head(server.make_url('/anything')) as response:
+                assert response.status == 200
+        assert proxy.load_balancer.server_response_times[0].count == 3
+        await server.close()
+        await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_upstream_failures_map_to_gateway_errors():
+    async def scenario():
+        backend = TestServer(backend_app())
+        await backend.start_server()
+        dead = TestServer(web.Application())
+        await dead.start_server()
+        dead_url = str(dead.make_url(''))
+        await dead.close()
+
+        proxy, server = await proxied([str(backend.make_url(''))], timeout=0.2)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url('/slow')) as response:
+                assert response.status == 504
+        await server.close()
+
+        proxy, server = await proxied([dead_url])
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url('/')) as response:
+                assert response.status == 502
+            assert proxy.healthy == set()
+            async with session.get(server.make_url('/')) as response:
+                assert response.status == 503
+        await server.close()
+        await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_client_key_falls_back_when_remote_is_unknown():
+    request = make_mocked_request('GET', '/', headers={'X-Forwarded-For': '10.0.0.7, 10.0.0.1'})
+    assert request.remote is None
+    assert LoadBalancingProxy._client_key(request) == '10.0.0.7'
+    assert LoadBalancingProxy._client_key(make_mocked_request('GET', '/')) == 'unknown'
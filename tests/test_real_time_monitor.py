@@ -0,0 +1,43 @@
+import asyncio
+
+import msgpack
+import websockets
+
+from app.load_balancer import LoadBalancer
+from app.real_time_monitor import RealTimeMonitor
+
+
+def test_connect_delta_disconnect_and_shutdown():
+    async def scenario():
+        load_balancer = LoadBalancer(num_servers=2, seed=0)
+        monitor = RealTimeMonitor(load_balancer, tick=0.05)
+        server = await websockets.serve(monitor.monitor_load, 'localhost', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async with websockets.connect(f'ws://localhost:{port}') as websocket:
+            first = msgpack.unpackb(await websocket.recv())
+            assert set(first['full']) == {'server_0', 'server_1'}
+            load_balancer.dispatch_batch('round_robin', [50.0, 60.0])
+            delta = msgpack.unpackb(await asyncio.wait_for(websocket.recv(), 5))
+            assert delta['seq'] == first['seq'] + 1
+            assert delta['delta']['server_0']['avg_load'] > 0
+
+        # The metrics no longer change, yet the handler must notice the disconnect
+        for _ in range(100):
+            if not monitor._clients and monitor._producer is None:
+                break
+            await asyncio.sleep(0.02)
+        assert not monitor._clients
+        assert monitor._producer is None
+
+        # A later client gets the current metrics, not the snapshot from before it connected
+        load_balancer.dispatch_batch('round_robin', [500.0, 500.0])
+        async with websockets.connect(f'ws://localhost:{port}') as websocket:
+            full = msgpack.unpackb(await websocket.recv())['full']
+            assert full['server_0']['max_load'] > 100
+
+            server.close()
+            await asyncio.wait_for(server.wait_closed(), 5)
+        assert not monitor._clients
+
+    asyncio.run(scenario())
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.sketch import DDSketch, SignedDDSketch
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(0).normal(0, 10, 20000),
+    np.random.default_rng(1).normal(-50, 10, 20000),
+    np.r_[np.zeros(12000), np.random.default_rng(2).uniform(1, 5, 8000)],
+])
+def test_signed_sketch_quantiles_within_relative_accuracy(values):
+    sketch = SignedDDSketch()
+    sketch.add_many(values[:5000])
+    sketch.add_many(values[5000:])
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    expected = np.quantile(values, qs, method='lower')
+    # One step of rank between neighbouring values, so compare within accuracy of either neighbour
+    upper = np.quantile(values, qs, method='higher')
+    for value, low, high in zip(sketch.quantiles(qs), expected, upper):
+        assert min(abs(value - low) - 0.01 * abs(low), abs(value - high) - 0.01 * abs(high)) <= 1e-9
+
+
+def within_accuracy(value, values, q, accuracy):
+    """Whether value is within accuracy of the true quantile, or of the next value by rank"""
+    low, high = np.quantile(values, q, method='lower'), np.quantile(values, q, method='higher')
+    return abs(value - low) <= accuracy * abs(low) + 1e-12 or abs(value - high) <= accuracy * abs(high) + 1e-12
+
+
+@pytest.mark.parametrize('max_bins', [2048, 400])
+def test_quantiles_after_add_and_remove_cycles(max_bins):
+    rng = np.random.default_rng(0)
+    sketch = DDSketch(relative_accuracy=0.01, max_bins=max_bins)
+    batches = []
+    for cycle in range(40):
+        # Drifting lognormal values over several orders of magnitude, plus zeros
+        batch = np.r_[rng.lognormal(cycle / 5, 1.5, 500), np.zeros(10)]
+        sketch.add_many(batch)
+        batches.append(batch)
+        if len(batches) > 5:
+            sketch.remove_many(batches.pop(0))
+
+        retained = np.concatenate(batches)
+        assert sketch.count == len(retained)
+        assert sketch.zero_count + sketch._bins.sum() == len(retained)
+        assert (sketch._bins >= 0).all()
+        # With few bins the lowest ones are collapsed, which only affects the low quantiles
+        qs = [0.5, 0.9, 0.99] if max_bins < 2048 else [0.01, 0.1, 0.5, 0.9, 0.99]
+        for q, value in zip(qs, sketch.quantiles(qs)):
+            assert within_accuracy(value, retained, q, sketch.relative_accuracy)
+    if max_bins < 2048:
+        assert len(sketch._bins) == max_bins  # The range did outgrow max_bins
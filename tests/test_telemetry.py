@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from app.telemetry import RingBuffer, SlidingWindow
+
+
+def test_extend_matches_append_including_values_beyond_the_window():
+    values = np.random.default_rng(0).normal(50, 10, 25)
+    batched, single = SlidingWindow(size=10, alpha=0.3), SlidingWindow(size=10, alpha=0.3)
+    batched.extend(values[:5])
+    batched.extend(values[5:])  # Longer than the window
+    for value in values:
+        single.append(value)
+
+    assert batched.ewma == pytest.approx(single.ewma)
+    assert batched.count == single.count == 10
+    assert batched.mean() == pytest.approx(values[-10:].mean())
+
+
+@pytest.mark.parametrize('size, seconds', [(10, None), (None, 5.0), (50, 2.0)])
+def test_window_matches_recomputing_over_the_retained_values(size, seconds):
+    rng = np.random.default_rng(1)
+    now = [0.0]
+    window = SlidingWindow(size=size, seconds=seconds, clock=lambda: now[0])
+    expected = []  # (arrival time, value)
+    for _ in range(500):
+        now[0] += rng.uniform(0, 0.05)
+        values = [rng.uniform(1, 100)] if rng.random() < 0.7 else rng.uniform(1, 100, rng.integers(0, 200))
+        if len(values) == 1:
+            window.append(values[0])
+        else:
+            window.extend(values)
+        expected = (expected + [(now[0], value) for value in values])[-size if size else 0:]
+        if seconds:
+            expected = [(time, value) for time, value in expected if time >= now[0] - seconds]
+        retained = np.array([value for _, value in expected])
+
+        assert len(window) == len(retained)
+        np.testing.assert_allclose(window.values(), retained)
+        assert window.mean() == pytest.approx(retained.mean() if len(retained) else 0.0)
+        if len(retained):
+            true = np.quantile(retained, 0.95, method='lower')
+            assert abs(window.quantile(0.95) - true) <= 2 * window._sketch.relative_accuracy * true
+
+
+@pytest.mark.parametrize('appended', [3, 10, 17])
+def test_ring_buffer_tail_matches_the_end_of_values(appended):
+    buffer = RingBuffer(capacity=10)
+    buffer.extend(np.arange(appended, dtype=float))
+    for k in (0, 1, 4, 10, 12):
+        np.testing.assert_array_equal(buffer.tail(k), buffer.values()[len(buffer) - min(k, len(buffer)):])